@@ -0,0 +1,53 @@
+"""Benchmark for reading many small json files with the async functions of hkkang_utils.file
+
+Usage:
+    python benchmarks/bench_async_io.py --num_files 2000 --max_workers 1 4 16
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import hkkang_utils.file as file_utils
+
+
+async def read_sequentially(file_paths):
+    # Blocking reads on the event loop
+    return [file_utils.read_json_file(file_path) for file_path in file_paths]
+
+
+async def read_concurrently(file_paths):
+    return await asyncio.gather(
+        *[file_utils.aread_json_file(file_path) for file_path in file_paths]
+    )
+
+
+def main(num_files: int, max_workers_list: list):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_paths = [os.path.join(tmp_dir, f"{i}.json") for i in range(num_files)]
+        for i, file_path in enumerate(file_paths):
+            file_utils.write_json_file({"id": i, "text": "text " * 100}, file_path)
+
+        start_time = time.perf_counter()
+        asyncio.run(read_sequentially(file_paths))
+        baseline = time.perf_counter() - start_time
+        print(f"blocking reads      {baseline:.3f}s")
+
+        for max_workers in max_workers_list:
+            file_utils.set_async_io_max_workers(max_workers)
+            start_time = time.perf_counter()
+            asyncio.run(read_concurrently(file_paths))
+            elapsed_time = time.perf_counter() - start_time
+            print(
+                f"async (workers={max_workers:<3}) {elapsed_time:.3f}s "
+                f"(speedup: {baseline / elapsed_time:.2f}x)"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_files", type=int, default=2000)
+    parser.add_argument("--max_workers", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+    main(args.num_files, args.max_workers)
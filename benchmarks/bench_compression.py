@@ -0,0 +1,54 @@
+"""Benchmark for reading and writing compressed jsonl files with hkkang_utils.file
+
+Usage:
+    python benchmarks/bench_compression.py --num_records 200000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import hkkang_utils.file as file_utils
+
+
+def generate_records(num_records: int):
+    for i in range(num_records):
+        yield {"id": i, "text": f"sentence number {i} " * 5, "score": i / 3}
+
+
+def main(num_records: int, compression_level: int = None):
+    records = list(generate_records(num_records))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        raw_size = None
+        for extension in ["", ".gz", ".bz2", ".xz", ".zst"]:
+            file_path = os.path.join(tmp_dir, f"bench.jsonl{extension}")
+            try:
+                start_time = time.perf_counter()
+                file_utils.write_jsonl_file(
+                    records, file_path, compression_level=compression_level
+                )
+                write_time = time.perf_counter() - start_time
+            except ImportError as e:
+                print(f"{extension:<5} skipped ({e})")
+                continue
+            start_time = time.perf_counter()
+            file_utils.read_jsonl_file(file_path)
+            read_time = time.perf_counter() - start_time
+
+            file_size = os.path.getsize(file_path)
+            raw_size = raw_size or file_size
+            mb = raw_size / 1024 / 1024
+            print(
+                f"{extension or 'raw':<5} size: {file_utils.bytes_to_readable(file_size):>10} "
+                f"(ratio: {raw_size / file_size:5.2f}x) "
+                f"write: {mb / write_time:7.1f} MB/s read: {mb / read_time:7.1f} MB/s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_records", type=int, default=200000)
+    parser.add_argument("--compression_level", type=int, default=None)
+    args = parser.parse_args()
+    main(args.num_records, args.compression_level)
@@ -0,0 +1,63 @@
+"""Benchmark for the json backends of hkkang_utils.file
+
+Usage:
+    python benchmarks/bench_json.py --num_records 100000
+"""
+import argparse
+import time
+
+import numpy as np
+
+import hkkang_utils.file as file_utils
+
+
+def generate_payloads(num_records: int):
+    return {
+        "small records": [
+            {"id": i, "text": f"sentence number {i}", "score": i / 3}
+            for i in range(num_records)
+        ],
+        "text-heavy records": [
+            {"id": i, "text": "한국어 텍스트와 English text " * 20}
+            for i in range(num_records // 10)
+        ],
+        "numeric records": [
+            {"id": i, "embedding": np.random.rand(64).tolist()}
+            for i in range(num_records // 10)
+        ],
+    }
+
+
+def main(num_records: int):
+    for payload_name, records in generate_payloads(num_records).items():
+        print(payload_name)
+        for backend_name in file_utils.JSON_BACKEND_FACTORIES:
+            try:
+                backend = file_utils.get_json_backend(backend_name)
+            except ImportError:
+                print(f"  {backend_name:<7} skipped (not installed)")
+                continue
+            start_time = time.perf_counter()
+            lines = [backend.dumps(record) for record in records]
+            dump_time = time.perf_counter() - start_time
+            start_time = time.perf_counter()
+            for line in lines:
+                backend.loads(line)
+            load_time = time.perf_counter() - start_time
+            # Indented dump (write_json_file uses indent=4 by default)
+            start_time = time.perf_counter()
+            indented_mb = len(backend.dumps(records, indent=4)) / 1024 / 1024
+            indented_dump_time = time.perf_counter() - start_time
+            mb = sum(len(line) for line in lines) / 1024 / 1024
+            print(
+                f"  {backend_name:<7} dump: {mb / dump_time:7.1f} MB/s "
+                f"load: {mb / load_time:7.1f} MB/s "
+                f"dump (indent=4): {indented_mb / indented_dump_time:7.1f} MB/s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_records", type=int, default=100000)
+    args = parser.parse_args()
+    main(args.num_records)
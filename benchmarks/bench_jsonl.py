@@ -0,0 +1,43 @@
+"""Benchmark for reading jsonl files with hkkang_utils.file
+
+Usage:
+    python benchmarks/bench_jsonl.py --num_records 1000000 --num_workers 1 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import hkkang_utils.file as file_utils
+
+
+def generate_records(num_records: int):
+    for i in range(num_records):
+        yield {"id": i, "text": f"sentence number {i} " * 5, "score": i / 3}
+
+
+def main(num_records: int, num_workers_list: list):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "bench.jsonl")
+        file_utils.write_jsonl_file(generate_records(num_records), file_path)
+        file_size = os.path.getsize(file_path)
+        print(f"{num_records} records ({file_utils.bytes_to_readable(file_size)})")
+
+        baseline = None
+        for num_workers in num_workers_list:
+            start_time = time.perf_counter()
+            file_utils.read_jsonl_file(file_path, num_workers=num_workers)
+            elapsed_time = time.perf_counter() - start_time
+            baseline = baseline or elapsed_time
+            print(
+                f"num_workers={num_workers:<3} {elapsed_time:.3f}s "
+                f"(speedup: {baseline / elapsed_time:.2f}x)"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_records", type=int, default=1000000)
+    parser.add_argument("--num_workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    main(args.num_records, args.num_workers)
@@ -0,0 +1,67 @@
+"""Benchmark for MultiProcessor: chunked map vs. one task per item, and shared arrays vs. pickled arrays
+
+Usage:
+    python benchmarks/bench_multiprocessor.py --num_items 100000 --array_mb 256
+"""
+import argparse
+import time
+
+import numpy as np
+
+from hkkang_utils.concurrent import MultiProcessor
+
+
+def add_one(x: int) -> int:
+    return x + 1
+
+
+def sum_rows(array: np.ndarray, start: int, end: int) -> float:
+    return float(array[start:end].sum())
+
+
+def sum_shared_rows(handle, start: int, end: int) -> float:
+    return float(handle.array[start:end].sum())
+
+
+def bench_map(num_workers: int, num_items: int):
+    with MultiProcessor(num_workers=num_workers) as multiprocessor:
+        start_time = time.perf_counter()
+        for i in range(num_items):
+            multiprocessor.run(add_one, i)
+        multiprocessor.join()
+        print(f"run per item          {time.perf_counter() - start_time:.3f}s")
+    with MultiProcessor(num_workers=num_workers) as multiprocessor:
+        start_time = time.perf_counter()
+        list(multiprocessor.map(add_one, range(num_items)))
+        print(
+            f"map (auto chunksize)  {time.perf_counter() - start_time:.3f}s "
+            f"(chunksize: {multiprocessor.last_chunksize})"
+        )
+
+
+def bench_shared_array(num_workers: int, array_mb: int, num_tasks: int = 16):
+    array = np.random.rand(array_mb * 1024 * 1024 // 8 // 1024, 1024)
+    step = len(array) // num_tasks
+    with MultiProcessor(num_workers=num_workers) as multiprocessor:
+        start_time = time.perf_counter()
+        for start in range(0, len(array), step):
+            multiprocessor.run(sum_rows, array, start, start + step)
+        multiprocessor.join()
+        print(f"pickled array         {time.perf_counter() - start_time:.3f}s")
+    with MultiProcessor(num_workers=num_workers) as multiprocessor:
+        start_time = time.perf_counter()
+        handle = multiprocessor.share(array)
+        for start in range(0, len(array), step):
+            multiprocessor.run(sum_shared_rows, handle, start, start + step)
+        multiprocessor.join()
+        print(f"shared array          {time.perf_counter() - start_time:.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_workers", type=int, default=4)
+    parser.add_argument("--num_items", type=int, default=100000)
+    parser.add_argument("--array_mb", type=int, default=256)
+    args = parser.parse_args()
+    bench_map(args.num_workers, args.num_items)
+    bench_shared_array(args.num_workers, args.array_mb)
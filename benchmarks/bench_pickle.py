@@ -0,0 +1,51 @@
+"""Benchmark for writing and reading pickle files with large NumPy arrays
+
+Usage:
+    python benchmarks/bench_pickle.py --num_arrays 8 --array_mb 64
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import hkkang_utils.file as file_utils
+
+
+def measure(func, *args, **kwargs) -> float:
+    start_time = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start_time
+
+
+def main(num_arrays: int, array_mb: int):
+    num_items = array_mb * 1024 * 1024 // 4
+    object_to_save = {
+        f"array_{i}": np.random.rand(num_items).astype(np.float32)
+        for i in range(num_arrays)
+    }
+    total_mb = num_arrays * array_mb
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "bench.pkl")
+        for name, write_kwargs, read_kwargs in [
+            ("default", {}, {}),
+            ("protocol 5 (out-of-band)", {"out_of_band": True}, {"mmap_buffers": False}),
+            ("protocol 5 (out-of-band, mmap)", {"out_of_band": True}, {}),
+        ]:
+            write_time = measure(
+                file_utils.write_pickle_file, object_to_save, file_path, **write_kwargs
+            )
+            read_time = measure(file_utils.read_pickle_file, file_path, **read_kwargs)
+            print(
+                f"{name:<32} write: {total_mb / write_time:8.1f} MB/s "
+                f"read: {total_mb / read_time:8.1f} MB/s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_arrays", type=int, default=8)
+    parser.add_argument("--array_mb", type=int, default=64)
+    args = parser.parse_args()
+    main(args.num_arrays, args.array_mb)
@@ -0,0 +1,46 @@
+"""Benchmark for the pure-Python and the libyaml-based (C) yaml loaders/dumpers
+
+Usage:
+    python benchmarks/bench_yaml.py --num_items 20000
+"""
+import argparse
+import io
+import time
+
+import yaml
+
+import hkkang_utils.file as file_utils
+
+
+def measure(func, *args, **kwargs) -> float:
+    start_time = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start_time
+
+
+def main(num_items: int):
+    data = {
+        f"item_{i}": {"id": i, "name": f"name_{i}", "values": [i, i / 2, str(i)]}
+        for i in range(num_items)
+    }
+    text = yaml.dump(data, Dumper=file_utils.YamlDumper, default_flow_style=False)
+    print(f"yaml size: {file_utils.bytes_to_readable(len(text))}")
+    for name, loader, dumper in [
+        ("pure-Python", yaml.SafeLoader, yaml.Dumper),
+        ("libyaml (C)", file_utils.YamlLoader, file_utils.YamlDumper),
+    ]:
+        load_time = measure(yaml.load, io.StringIO(text), Loader=loader)
+        dump_time = measure(
+            yaml.dump, data, io.StringIO(), Dumper=dumper, default_flow_style=False
+        )
+        print(
+            f"{name:<12} ({loader.__name__}/{dumper.__name__}) "
+            f"load: {load_time:.3f}s dump: {dump_time:.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_items", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.num_items)
@@ -1,3 +1,4 @@
+import importlib
 import sys
 
 sys_version = sys.version_info
@@ -24,24 +25,16 @@ __all__ = [
     "wandb",
 ]
 
-if sys_version[0] == 3 and sys_version[1] > 7:
-    import hkkang_utils.concurrent
 
-import hkkang_utils.data
-import hkkang_utils.file
-import hkkang_utils.io
-import hkkang_utils.list
-import hkkang_utils.logging
-import hkkang_utils.metrics
-import hkkang_utils.misc
-import hkkang_utils.ml
-import hkkang_utils.pattern
-import hkkang_utils.pg
-import hkkang_utils.slack
-import hkkang_utils.socket
-import hkkang_utils.sql
-import hkkang_utils.string
-import hkkang_utils.tensor
-import hkkang_utils.testing
-import hkkang_utils.time
-import hkkang_utils.wandb
+# Submodules are imported lazily (PEP 562) so that `import hkkang_utils` does not
+# pull in heavy dependencies (e.g., torch, wandb, nltk) until they are actually used.
+def __getattr__(name: str):
+    if name in __all__:
+        module = importlib.import_module(f"{__name__}.{name}")
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
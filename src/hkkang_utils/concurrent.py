@@ -1,11 +1,33 @@
+import asyncio
+import collections
+import dataclasses
 import functools
+import hashlib
+import heapq
+import itertools
 import logging
+import multiprocessing
+import os
+import pickle
+import sys
 import threading
+import time
 import traceback
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    BrokenExecutor,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from multiprocessing import resource_tracker, shared_memory
 from typing import *
 
-from hkkang_utils.list import divide_into_chunks, do_flatten_list
+import tqdm
+
+from hkkang_utils.list import divide_into_even_chunks, do_flatten_list
+from hkkang_utils.time import Timer
 
 
 def _shorten_string(text: str) -> str:
@@ -15,6 +37,348 @@ def _shorten_string(text: str) -> str:
     return text
 
 
+# Target duration of a task (i.e., a chunk of items) when the chunksize of MultiProcessor.map is auto-tuned
+TARGET_TASK_SECONDS = 0.1
+MAX_AUTO_CHUNKSIZE = 10000
+
+
+def _run_chunk(func: Callable, items: List[Any]) -> Tuple[List[Any], float]:
+    """Apply func to each item and measure the elapsed time"""
+    start_time = time.perf_counter()
+    results = [func(item) for item in items]
+    return results, time.perf_counter() - start_time
+
+
+def _run_instrumented_task(
+    task: Union[Callable, bytes], serialize: bool
+) -> Tuple[Any, Tuple[int, float, float, float, float]]:
+    """Run the task in the worker and measure the time of each step.
+    If serialize is True, the task and its result are pickled explicitly to measure the serialization time.
+
+    :return: result (pickled if serialize is True), and (worker id, start time, execution start time, execution end time, end time)
+    """
+    start_time = time.time()
+    if serialize:
+        task = pickle.loads(task)
+    execution_start_time = time.time()
+    result = task()
+    execution_end_time = time.time()
+    if serialize:
+        result = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+    worker_id = os.getpid() if serialize else threading.get_ident()
+    return result, (
+        worker_id,
+        start_time,
+        execution_start_time,
+        execution_end_time,
+        time.time(),
+    )
+
+
+@dataclasses.dataclass
+class TaskRecord:
+    """Timestamps (in seconds since the epoch) and durations of a task measured by MultiProcessorStats"""
+
+    worker_id: int
+    num_items: int
+    submitted_time: float
+    started_time: float
+    finished_time: float
+    received_time: float
+    # Time to pickle and unpickle the task and its result (in both processes)
+    serialization_time: float
+    execution_time: float
+
+    @property
+    def latency(self) -> float:
+        return self.received_time - self.submitted_time
+
+    @property
+    def queue_time(self) -> float:
+        """Time waiting for a free worker, including the transfer of the task"""
+        return self.started_time - self.submitted_time
+
+
+def _get_percentile(values: List[float], percentile: float) -> float:
+    """Get the percentile of values with the nearest-rank method"""
+    if not values:
+        return 0.0
+    sorted_values = sorted(values)
+    rank = max(0, int(round(percentile / 100 * len(sorted_values) + 0.5)) - 1)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class MultiProcessorStats:
+    """Throughput and worker-utilization metrics of the tasks run by MultiProcessor (and ThreadPool).
+    The times of each task are also added to the Timer instances named MultiProcessor.*,
+    so that they show up in Timer.summarize_measured_times().
+
+    example:
+        multiprocessor = MultiProcessor(num_workers=4, collect_stats=True)
+        ...
+        multiprocessor.join()
+        print(multiprocessor.stats.summary())
+    """
+
+    def __init__(self):
+        self.records: List[TaskRecord] = []
+        self.num_submitted = 0
+        self.num_failed = 0
+        self.max_queue_depth = 0
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+
+    @property
+    def num_completed(self) -> int:
+        return len(self.records)
+
+    @property
+    def num_items(self) -> int:
+        return sum(record.num_items for record in self.records)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of tasks submitted but not finished yet"""
+        return self.num_submitted - self.num_completed - self.num_failed
+
+    @property
+    def elapsed_time(self) -> float:
+        if self.start_time is None:
+            return 0.0
+        end_time = time.time() if self.queue_depth else self.end_time
+        return end_time - self.start_time
+
+    @property
+    def tasks_per_sec(self) -> float:
+        return self.num_completed / self.elapsed_time if self.elapsed_time else 0.0
+
+    @property
+    def items_per_sec(self) -> float:
+        """Same as tasks_per_sec, but counts each item of the chunks sent by map"""
+        return self.num_items / self.elapsed_time if self.elapsed_time else 0.0
+
+    @property
+    def worker_busy_times(self) -> Dict[int, float]:
+        """Total execution time of each worker (process id, or thread id for ThreadPool)"""
+        busy_times = collections.defaultdict(float)
+        for record in self.records:
+            busy_times[record.worker_id] += record.execution_time
+        return dict(busy_times)
+
+    @property
+    def worker_utilizations(self) -> Dict[int, float]:
+        """Fraction of the elapsed time each worker spent executing tasks"""
+        elapsed_time = self.elapsed_time
+        return {
+            worker_id: busy_time / elapsed_time if elapsed_time else 0.0
+            for worker_id, busy_time in self.worker_busy_times.items()
+        }
+
+    @property
+    def total_serialization_time(self) -> float:
+        return sum(record.serialization_time for record in self.records)
+
+    @property
+    def total_execution_time(self) -> float:
+        return sum(record.execution_time for record in self.records)
+
+    def get_latency_percentiles(
+        self, percentiles: Iterable[float] = (50, 90, 99)
+    ) -> Dict[float, float]:
+        """Percentiles of the task latency (from submission to the reception of the result)"""
+        latencies = [record.latency for record in self.records]
+        return {
+            percentile: _get_percentile(latencies, percentile)
+            for percentile in percentiles
+        }
+
+    def on_submit(self) -> None:
+        if self.start_time is None or not self.queue_depth:
+            # Do not count the idle time between batches
+            self._restart_clock()
+        self.num_submitted += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def on_failure(self) -> None:
+        self.num_failed += 1
+        self.end_time = time.time()
+
+    def on_complete(self, record: TaskRecord) -> None:
+        self.records.append(record)
+        self.end_time = record.received_time
+        Timer(class_name="MultiProcessor", func_name="serialize").add_elapsed_time(
+            record.serialization_time, record.received_time
+        )
+        Timer(class_name="MultiProcessor", func_name="wait_in_queue").add_elapsed_time(
+            record.queue_time, record.started_time
+        )
+        Timer(class_name="MultiProcessor", func_name="execute").add_elapsed_time(
+            record.execution_time, record.finished_time
+        )
+
+    def _restart_clock(self) -> None:
+        now = time.time()
+        if self.start_time is not None and self.end_time is not None:
+            # Shift the start time by the idle time
+            self.start_time += now - self.end_time
+        else:
+            self.start_time = now
+        self.end_time = now
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed_time = self.elapsed_time
+        return {
+            "num_completed": self.num_completed,
+            "num_failed": self.num_failed,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "elapsed_time": elapsed_time,
+            "tasks_per_sec": self.tasks_per_sec,
+            "items_per_sec": self.items_per_sec,
+            "total_execution_time": self.total_execution_time,
+            "total_serialization_time": self.total_serialization_time,
+            "latency_percentiles": self.get_latency_percentiles(),
+            "worker_utilizations": self.worker_utilizations,
+        }
+
+    def __repr__(self) -> str:
+        return f"MultiProcessorStats({self.summary()})"
+
+
+# Interval to check whether the submitted tasks have started running, to measure their time for task_timeout
+TASK_TIMEOUT_POLL_INTERVAL = 0.05
+
+
+class _TaskDeadlines:
+    """Track the deadline of each future, which is task_timeout seconds after the task starts running"""
+
+    def __init__(
+        self,
+        timeout: Optional[float],
+        is_started: Callable[[Any], bool],
+        scan_size: int,
+    ):
+        self.timeout = timeout
+        self.is_started = is_started
+        # Number of unstarted futures (in the order of submission) to check at once, as tasks start roughly in order
+        self.scan_size = scan_size
+        self._unstarted = collections.deque()
+        # Min-heap of (deadline, sequence number, future)
+        self._deadlines: List[Tuple[float, int, Any]] = []
+        self._counter = itertools.count()
+
+    def add(self, future: Any) -> None:
+        if self.timeout is not None:
+            self._unstarted.append(future)
+
+    def _update(self) -> None:
+        now = time.time()
+        for future in list(itertools.islice(self._unstarted, self.scan_size)):
+            if self.is_started(future):
+                self._unstarted.remove(future)
+                heapq.heappush(
+                    self._deadlines, (now + self.timeout, next(self._counter), future)
+                )
+        while self._deadlines and self._deadlines[0][2].done():
+            heapq.heappop(self._deadlines)
+
+    def get_wait_timeout(self) -> Optional[float]:
+        """Time to wait for the futures until the next deadline (or the next check of the unstarted futures)"""
+        if self.timeout is None:
+            return None
+        self._update()
+        timeouts = [TASK_TIMEOUT_POLL_INTERVAL] if self._unstarted else []
+        if self._deadlines:
+            timeouts.append(self._deadlines[0][0] - time.time())
+        return max(0.0, min(timeouts)) if timeouts else None
+
+    def get_expired_future(self) -> Optional[Any]:
+        if self.timeout is None:
+            return None
+        self._update()
+        if self._deadlines and self._deadlines[0][0] <= time.time():
+            return self._deadlines[0][2]
+        return None
+
+
+# Index of the task running in each worker process of MultiProcessor (-1 if idle), which is shared with the parent
+# process to find out which tasks were running when the pool broke (e.g., a worker process was killed)
+_worker_running_tasks: Optional[Any] = None
+_worker_slot: Optional[int] = None
+
+
+def _init_process_worker(
+    running_tasks: Any,
+    worker_counter: Any,
+    initializer: Optional[Callable],
+    initargs: Tuple,
+) -> None:
+    global _worker_running_tasks, _worker_slot
+    with worker_counter.get_lock():
+        _worker_slot = worker_counter.value % len(running_tasks)
+        worker_counter.value += 1
+    _worker_running_tasks = running_tasks
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def _run_tracked_task(index: int, task: Callable) -> Any:
+    if _worker_running_tasks is None:
+        return task()
+    _worker_running_tasks[_worker_slot] = index
+    try:
+        return task()
+    finally:
+        _worker_running_tasks[_worker_slot] = -1
+
+
+# Shared memory segments attached in the current process (name -> SharedMemory)
+_attached_shared_memories: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    if name in _attached_shared_memories:
+        return _attached_shared_memories[name]
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    else:
+        # Attaching registers the segment to the resource tracker (which is shared with the creator process)
+        # as if this process owned it. Skip the registration, so that only the creator unlinks the segment.
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+    _attached_shared_memories[name] = shm
+    return shm
+
+
+class SharedArray:
+    """Lightweight (picklable) handle of a NumPy array stored in shared memory.
+    Workers attach to the shared memory and get the array without copying it.
+    Please create it with MultiProcessor.share, which releases the shared memory on join/close.
+    """
+
+    def __init__(self, name: str, shape: Tuple[int, ...], dtype: str):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    def __repr__(self) -> str:
+        return f"SharedArray(name={self.name}, shape={self.shape}, dtype={self.dtype})"
+
+    def __reduce__(self):
+        return (SharedArray, (self.name, self.shape, self.dtype))
+
+    @property
+    def array(self) -> "numpy.ndarray":
+        import numpy as np
+
+        shm = _attach_shared_memory(self.name)
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+
+
 class Thread(threading.Thread):
     """Please use start method to start thread. start method will call run method.
     If you are doing cpu intensive task, please use MultiProcessor class instead of this class. It's much faster.
@@ -98,29 +462,143 @@ class MultiProcessor:
 
         # Get results
         results = multiprocessor.results
+
+    example (long-lived pool):
+        # Worker processes are kept alive across batches until close() is called.
+        # The initializer is called once per worker process (e.g., to load a heavy model).
+        with MultiProcessor(num_workers=4, persistent=True, initializer=load_model) as multiprocessor:
+            for batch in batches:
+                for item in batch:
+                    multiprocessor.run(predict, item)
+                multiprocessor.join()
+                results = multiprocessor.results  # Results of the current batch only
+
+    Set task_timeout to limit the running time (in seconds) of each task, measured from when it starts running.
+    When a task exceeds it, join raises TimeoutError, cancels the pending tasks and terminates the worker processes
+    (the threads of ThreadPool cannot be terminated, so the timed-out task keeps running in the background).
+    ThreadPool and AsyncPool share this interface for I/O-bound and asyncio workloads.
+
+    example (fault-tolerant job):
+        # Failed tasks are retried up to 3 times with exponential backoff (1s, 2s, 4s).
+        # If a worker dies (e.g., OOM-killed), the pool is respawned and the unfinished tasks are resubmitted.
+        # Only the task that crashed the worker uses up its retries (if several tasks were running, they are rerun one at a time).
+        # Tasks that still fail are returned as exceptions in results instead of raising.
+        # Finished tasks are checkpointed, so re-running the script skips them and restores their results.
+        with MultiProcessor(
+            num_workers=4,
+            max_retries=3,
+            retry_backoff=1.0,
+            return_exceptions=True,
+            checkpoint_path="job.ckpt",
+        ) as multiprocessor:
+            for item in items:
+                multiprocessor.run(process, item)
+        failed = [r for r in multiprocessor.results if isinstance(r, Exception)]
+
+    example (instrumentation):
+        # Show a progress bar and collect throughput, latency and worker-utilization metrics
+        multiprocessor = MultiProcessor(num_workers=4, collect_stats=True, show_progress=True)
+        ...
+        print(multiprocessor.stats.summary())
+        # The serialization, queueing and execution times are also summarized with the other timers
+        Timer.summarize_measured_times()
     """
 
-    def __init__(self, num_workers: int, store_results: bool = True):
+    # Whether tasks and results are pickled to be sent to the workers
+    _serializes_tasks = True
+
+    def __init__(
+        self,
+        num_workers: int,
+        store_results: bool = True,
+        persistent: bool = False,
+        initializer: Optional[Callable] = None,
+        initargs: Tuple = (),
+        mp_context: Optional[Union[str, multiprocessing.context.BaseContext]] = None,
+        task_timeout: Optional[float] = None,
+        max_retries: int = 0,
+        retry_backoff: float = 1.0,
+        return_exceptions: bool = False,
+        checkpoint_path: Optional[str] = None,
+        collect_stats: bool = False,
+        show_progress: bool = False,
+    ):
         self.num_workers = num_workers
-        self._futures = []
+        # Tasks of the current batch: (task index, task, future). task is None if restored from the checkpoint
+        self._futures: List[Tuple[int, Optional[Callable], Optional[Any]]] = []
+        self._num_tasks = 0
         self._results = []
         self.store_results = store_results
+        self.persistent = persistent
+        self.initializer = initializer
+        self.initargs = initargs
+        self.mp_context = (
+            multiprocessing.get_context(mp_context)
+            if isinstance(mp_context, str)
+            else mp_context
+        )
+        self.task_timeout = task_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.return_exceptions = return_exceptions
+        self.checkpoint_path = checkpoint_path
+        self._checkpointed_results: Dict[int, Any] = (
+            self._load_checkpoint(checkpoint_path) if checkpoint_path else {}
+        )
+        self._executor: Optional[Executor] = None
+        self._running_tasks: Optional[Any] = None
+        self._shared_memories: List[shared_memory.SharedMemory] = []
+        self.last_chunksize: Optional[int] = None
+        self.show_progress = show_progress
+        self.stats: Optional[MultiProcessorStats] = (
+            MultiProcessorStats() if collect_stats else None
+        )
+        # Submission time and serialization time of the tasks submitted with collect_stats
+        self._submission_infos: Dict[Any, Tuple[float, float, int]] = {}
         self.logger = logging.getLogger(f"MultiProcessor")
 
     @property
     def results(self):
         return self._results
 
-    @functools.cached_property
-    def executor(self):
-        return ProcessPoolExecutor(max_workers=self.num_workers)
+    @property
+    def executor(self) -> Executor:
+        # Create a new pool if it has not been created yet or has been shut down
+        if self._executor is None:
+            self._executor = self._create_executor()
+        return self._executor
+
+    def _create_executor(self) -> Executor:
+        context = self.mp_context or multiprocessing.get_context()
+        num_workers = self.num_workers or os.cpu_count() or 1
+        self._running_tasks = context.Array("q", [-1] * num_workers, lock=False)
+        return ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=self.mp_context,
+            initializer=_init_process_worker,
+            initargs=(
+                self._running_tasks,
+                context.Value("i", 0),
+                self.initializer,
+                self.initargs,
+            ),
+        )
+
+    def _get_running_task_indices(self) -> Set[int]:
+        """Indices of the tasks that are running in the worker processes"""
+        if self._running_tasks is None:
+            return set()
+        return {index for index in self._running_tasks if index >= 0}
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_value, tb):
         # Clean up: Wait for all processes to finish
-        self.join()
+        try:
+            self.join()
+        finally:
+            self.close()
 
         if exc_type is not None:
             traceback.print_exception(exc_type, exc_value, tb)
@@ -152,18 +630,562 @@ class MultiProcessor:
         # Check the given function is not lambda function
         self._check_if_valid_function(func)
 
-        self._futures.append(
-            self.executor.submit(functools.partial(func, *args, **kwargs))
+        # Tasks are indexed in the order of submission, which identifies them in the checkpoint
+        index = self._num_tasks
+        self._num_tasks += 1
+        if index in self._checkpointed_results:
+            self._futures.append((index, None, None))
+            return
+        task = functools.partial(
+            _run_tracked_task, index, functools.partial(func, *args, **kwargs)
         )
+        self._futures.append((index, task, self._submit(task)))
 
     def join(self):
+        """Wait for the submitted tasks and store their results (results of the previous batch are replaced).
+        The pool is shut down unless the MultiProcessor is persistent."""
+        batch, self._futures = self._futures, []
+        results = [None] * len(batch)
+        tasks: Dict[int, Callable] = {}
+        pending: Dict[Any, int] = {}
+        for position, (index, task, future) in enumerate(batch):
+            if task is None:
+                results[position] = self._checkpointed_results.pop(index)
+            else:
+                tasks[position] = task
+                pending[future] = position
+        attempts = collections.Counter()
+        checkpoint_file = (
+            open(self.checkpoint_path, "ab") if self.checkpoint_path else None
+        )
+        progress_bar = tqdm.tqdm(
+            total=len(batch),
+            initial=len(batch) - len(pending),
+            desc=self.__class__.__name__,
+            disable=not self.show_progress,
+        )
+        # Tasks that may have crashed the pool, to be run alone to find out whether they are the cause
+        isolated_positions = collections.deque()
+        num_unexplained_crashes = 0
+
+        def is_started(future: Any) -> bool:
+            if future.done():
+                return True
+            if self._running_tasks is None:
+                return future.running()
+            # Futures of ProcessPoolExecutor are marked as running when they are queued to the workers
+            return batch[pending[future]][0] in self._get_running_task_indices()
+
+        deadlines = _TaskDeadlines(
+            self.task_timeout,
+            is_started=is_started,
+            scan_size=(self.num_workers or os.cpu_count() or 1) + 2,
+        )
+
+        def submit(position: int) -> None:
+            future = self._submit(tasks[position])
+            pending[future] = position
+            deadlines.add(future)
+
+        for future in pending:
+            deadlines.add(future)
+        try:
+            while pending or isolated_positions:
+                if not pending:
+                    submit(isolated_positions.popleft())
+                done, _ = wait(
+                    pending,
+                    timeout=deadlines.get_wait_timeout(),
+                    return_when=FIRST_COMPLETED,
+                )
+                if not done:
+                    expired_future = deadlines.get_expired_future()
+                    if expired_future is not None:
+                        raise TimeoutError(
+                            f"Task {batch[pending[expired_future]][0]} did not finish within {self.task_timeout} seconds."
+                        )
+                    continue
+                # All the unfinished tasks fail if the pool is broken (e.g., a worker process was killed).
+                # Only the tasks that were running can be the cause. The others are resubmitted without using up retries.
+                crashed_positions = set()
+                resubmit_positions = []
+                if any(
+                    isinstance(future.exception(), BrokenExecutor) for future in done
+                ):
+                    done, _ = wait(pending)
+                    running_indices = self._get_running_task_indices()
+                    self._respawn_executor()
+                    suspect_positions = [
+                        pending[future]
+                        for future in done
+                        if isinstance(future.exception(), BrokenExecutor)
+                        and batch[pending[future]][0] in running_indices
+                    ]
+                    if len(suspect_positions) == 1:
+                        crashed_positions.update(suspect_positions)
+                    elif len(suspect_positions) > 1:
+                        isolated_positions.extend(sorted(suspect_positions))
+                    else:
+                        # The pool broke without running a task (e.g., the initializer failed)
+                        num_unexplained_crashes += 1
+                        if num_unexplained_crashes > self.max_retries:
+                            raise next(iter(done)).exception()
+                retry_positions = []
+                for future in done:
+                    position = pending.pop(future)
+                    try:
+                        results[position] = self._receive(future)
+                    except Exception as exception:
+                        if isinstance(exception, BrokenExecutor) and (
+                            position not in crashed_positions
+                        ):
+                            if position not in isolated_positions:
+                                resubmit_positions.append(position)
+                            continue
+                        if attempts[position] < self.max_retries:
+                            attempts[position] += 1
+                            retry_positions.append(position)
+                            continue
+                        elif self.return_exceptions:
+                            results[position] = exception
+                        else:
+                            raise
+                    else:
+                        if checkpoint_file is not None:
+                            self._write_checkpoint(
+                                checkpoint_file,
+                                batch[position][0],
+                                results[position] if self.store_results else None,
+                            )
+                    progress_bar.update()
+                for position in sorted(resubmit_positions):
+                    submit(position)
+                if retry_positions:
+                    # Exponential backoff based on the number of retries so far
+                    max_attempt = max(
+                        attempts[position] for position in retry_positions
+                    )
+                    time.sleep(self.retry_backoff * 2 ** (max_attempt - 1))
+                    for position in sorted(retry_positions):
+                        self.logger.warning(
+                            f"Retrying task {batch[position][0]} (attempt {attempts[position]}/{self.max_retries})"
+                        )
+                        submit(position)
+        except TimeoutError:
+            # Stop the timed-out task, so that closing the pool does not wait for it
+            self._abort_executor()
+            raise
+        except BaseException:
+            # Cancel the tasks that have not started yet (running tasks cannot be interrupted)
+            for future in pending:
+                future.cancel()
+            raise
+        finally:
+            progress_bar.close()
+            if checkpoint_file is not None:
+                checkpoint_file.close()
         if self.store_results:
-            self._results = [future.result() for future in self._futures]
-        else:
-            for future in self._futures:
-                future.result()
+            self._results = results
         # Free memory
-        self.executor.shutdown()
+        if not self.persistent:
+            self.close()
+
+    def _submit(self, task: Callable, num_items: int = 1) -> Any:
+        """Submit the task to the pool (instrumented if collect_stats is set)"""
+        if self.stats is None:
+            return self.executor.submit(task)
+        submitted_time = time.time()
+        serialization_time = 0.0
+        if self._serializes_tasks:
+            task = pickle.dumps(task, protocol=pickle.HIGHEST_PROTOCOL)
+            serialization_time = time.time() - submitted_time
+        future = self.executor.submit(
+            _run_instrumented_task, task, self._serializes_tasks
+        )
+        self._submission_infos[future] = (submitted_time, serialization_time, num_items)
+        self.stats.on_submit()
+        return future
+
+    def _receive(self, future: Any) -> Any:
+        """Get the result of the task submitted with _submit (and record its stats)"""
+        if self.stats is None:
+            return future.result()
+        submitted_time, serialization_time, num_items = self._submission_infos.pop(
+            future
+        )
+        try:
+            result, timestamps = future.result()
+        except BaseException:
+            self.stats.on_failure()
+            raise
+        (
+            worker_id,
+            started_time,
+            execution_start_time,
+            execution_end_time,
+            finished_time,
+        ) = timestamps
+        received_time = time.time()
+        if self._serializes_tasks:
+            result = pickle.loads(result)
+            # Unpickling in the worker (task) and in this process (result), and pickling the result in the worker
+            serialization_time += (
+                (execution_start_time - started_time)
+                + (finished_time - execution_end_time)
+                + (time.time() - received_time)
+            )
+        self.stats.on_complete(
+            TaskRecord(
+                worker_id=worker_id,
+                num_items=num_items,
+                submitted_time=submitted_time,
+                started_time=started_time,
+                finished_time=finished_time,
+                received_time=time.time(),
+                serialization_time=serialization_time,
+                execution_time=execution_end_time - execution_start_time,
+            )
+        )
+        return result
+
+    def _respawn_executor(self) -> None:
+        self.logger.warning(f"The pool is broken. Respawning the worker processes.")
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _abort_executor(self) -> None:
+        """Shut down the pool without waiting for the running tasks (worker processes are terminated)"""
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return None
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    @staticmethod
+    def _write_checkpoint(checkpoint_file: BinaryIO, index: int, result: Any) -> None:
+        pickle.dump((index, result), checkpoint_file)
+        checkpoint_file.flush()
+
+    @staticmethod
+    def _load_checkpoint(checkpoint_path: str) -> Dict[int, Any]:
+        """Load the results of the finished tasks (by task index) from the checkpoint file"""
+        checkpointed_results = {}
+        if not os.path.exists(checkpoint_path):
+            return checkpointed_results
+        with open(checkpoint_path, "rb+") as f:
+            valid_size = 0
+            while True:
+                try:
+                    index, result = pickle.load(f)
+                except (EOFError, pickle.UnpicklingError):
+                    break
+                checkpointed_results[index] = result
+                valid_size = f.tell()
+            # Drop a record truncated by a crash, so that new records can be appended
+            f.truncate(valid_size)
+        return checkpointed_results
+
+    def close(self):
+        """Shut down the worker processes and release the shared arrays. A new pool is created if run is called again."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self._submission_infos.clear()
+        for shm in self._shared_memories:
+            _attached_shared_memories.pop(shm.name, None)
+            try:
+                shm.close()
+            except BufferError:
+                # Arrays referring to the shared memory are still alive. It is freed when they are garbage collected
+                pass
+            shm.unlink()
+        self._shared_memories = []
+
+    def share(self, array: Any) -> SharedArray:
+        """Copy an array (NumPy array, tensor or anything convertible with numpy.asarray) into shared memory once,
+        and get a lightweight handle to pass to tasks instead of the array. The array is accessible in workers
+        via handle.array without copying. The shared memory is released on join or map (unless persistent) or close.
+
+        Example:
+            with MultiProcessor(num_workers=4) as multiprocessor:
+                handle = multiprocessor.share(large_array)
+                for start in range(0, len(large_array), 1000):
+                    multiprocessor.run(process_rows, handle, start, start + 1000)
+
+            def process_rows(handle: SharedArray, start: int, end: int):
+                return handle.array[start:end].sum()
+        """
+        import numpy as np
+
+        array = np.ascontiguousarray(np.asarray(array))
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self._shared_memories.append(shm)
+        _attached_shared_memories[shm.name] = shm
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        return SharedArray(shm.name, array.shape, array.dtype.str)
+
+    def map(
+        self,
+        func: Callable,
+        iterable: Iterable[Any],
+        chunksize: Optional[int] = None,
+        ordered: bool = True,
+        max_in_flight: Optional[int] = None,
+    ) -> Iterator[Any]:
+        """Apply func to each item of iterable in the worker processes and lazily yield the results.
+        Items are sent to the workers in chunks to reduce the IPC overhead,
+        and at most max_in_flight chunks are submitted at once (the iterable is consumed lazily).
+        Like join, the pool is shut down when the iteration ends unless the MultiProcessor is persistent
+        (or tasks submitted with run are waiting for join).
+
+        :param func: function to apply (must be picklable, i.e., not a lambda function)
+        :type func: Callable
+        :param iterable: items to process
+        :type iterable: Iterable[Any]
+        :param chunksize: number of items per task, defaults to None
+            (auto-tuned so that each task takes about TARGET_TASK_SECONDS based on the measured per-item latency)
+        :type chunksize: Optional[int], optional
+        :param ordered: yield results in the order of the items. If False, results are yielded as soon as the chunks finish, defaults to True
+        :type ordered: bool, optional
+        :param max_in_flight: maximum number of chunks submitted at once, defaults to None (2 * num_workers)
+        :type max_in_flight: Optional[int], optional
+        :yield: result of each item
+        :rtype: Iterator[Any]
+        """
+        self._check_if_valid_function(func)
+        max_in_flight = max_in_flight or self.num_workers * 2
+        auto_tune = chunksize is None
+        chunksize = chunksize or 1
+        items = iter(iterable)
+        pending = collections.deque()
+        per_item_latency = None
+        is_exhausted = False
+        progress_bar = tqdm.tqdm(
+            total=len(iterable) if hasattr(iterable, "__len__") else None,
+            desc=self.__class__.__name__,
+            disable=not self.show_progress,
+        )
+        try:
+            while True:
+                # Submit chunks until the number of chunks in flight reaches the limit
+                while not is_exhausted and len(pending) < max_in_flight:
+                    chunk = list(itertools.islice(items, chunksize))
+                    if chunk:
+                        pending.append(
+                            self._submit(
+                                functools.partial(_run_chunk, func, chunk),
+                                num_items=len(chunk),
+                            )
+                        )
+                    else:
+                        is_exhausted = True
+                if not pending:
+                    break
+                if ordered:
+                    future = pending.popleft()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    future = done.pop()
+                    pending.remove(future)
+                results, elapsed_time = self._receive(future)
+                # Tune the chunksize based on the measured per-item latency (exponential moving average)
+                if auto_tune and results:
+                    latency = elapsed_time / len(results)
+                    per_item_latency = (
+                        latency
+                        if per_item_latency is None
+                        else 0.8 * per_item_latency + 0.2 * latency
+                    )
+                    chunksize = int(TARGET_TASK_SECONDS / max(per_item_latency, 1e-9))
+                    chunksize = max(1, min(MAX_AUTO_CHUNKSIZE, chunksize))
+                self.last_chunksize = chunksize
+                progress_bar.update(len(results))
+                yield from results
+        finally:
+            progress_bar.close()
+            # Cancel the remaining chunks if the generator is closed early
+            for future in pending:
+                future.cancel()
+            # Free memory
+            if not self.persistent and not self._futures:
+                self.close()
+
+    def imap_unordered(
+        self,
+        func: Callable,
+        iterable: Iterable[Any],
+        chunksize: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> Iterator[Any]:
+        """Same as map with ordered=False"""
+        return self.map(
+            func,
+            iterable,
+            chunksize=chunksize,
+            ordered=False,
+            max_in_flight=max_in_flight,
+        )
+
+
+# Alias to match the names of the other pools
+ProcessPool = MultiProcessor
+
+
+class ThreadPool(MultiProcessor):
+    """Pool of threads with the same interface as MultiProcessor (run/join/results/map).
+    Use this for I/O-bound tasks (e.g., DB queries, file reads, API calls), where processes are unnecessary.
+    Lambda functions can be used, as tasks are not pickled.
+
+    example:
+        with ThreadPool(num_workers=16, task_timeout=30) as pool:
+            for query in queries:
+                pool.run(execute_query, query)
+            pool.join()
+            results = pool.results
+    """
+
+    _serializes_tasks = False
+
+    def _create_executor(self) -> Executor:
+        return ThreadPoolExecutor(
+            max_workers=self.num_workers,
+            initializer=self.initializer,
+            initargs=self.initargs,
+        )
+
+    def _check_if_valid_function(self, func: Callable):
+        if not callable(func):
+            self.logger.error(
+                f"Given function is not callable. Please use callable function."
+            )
+            return False
+        return True
+
+
+class AsyncPool:
+    """Run coroutine functions concurrently with the same interface as MultiProcessor (run/join/results).
+    At most num_workers coroutines run at once, and each task is cancelled if it takes longer than task_timeout.
+
+    example:
+        pool = AsyncPool(num_workers=32, task_timeout=10)
+        for url in urls:
+            pool.run(fetch, url)
+        # Call join in synchronous code, or await ajoin in asynchronous code
+        pool.join()
+        results = pool.results
+    """
+
+    def __init__(
+        self,
+        num_workers: int,
+        store_results: bool = True,
+        task_timeout: Optional[float] = None,
+    ):
+        self.num_workers = num_workers
+        self.store_results = store_results
+        self.task_timeout = task_timeout
+        self._tasks: List[Tuple[Callable, Tuple, Dict]] = []
+        self._results = []
+        self.logger = logging.getLogger(f"AsyncPool")
+
+    @property
+    def results(self):
+        return self._results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.join()
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            await self.ajoin()
+        return False
+
+    def run(self, *args, **kwargs):
+        """Pass coroutine function in the first argument.
+        Then, pass other arguments and keyword arguments as you would to the coroutine function.
+        """
+        assert len(args) > 0, f"Please pass function as the first argument."
+        func: Callable = args[0]
+        assert asyncio.iscoroutinefunction(
+            func
+        ), f"AsyncPool requires a coroutine function, but {func} is given."
+        self._tasks.append((func, args[1:], kwargs))
+
+    async def ajoin(self):
+        """Run the submitted coroutines and store their results (results of the previous batch are replaced)"""
+        tasks, self._tasks = self._tasks, []
+        semaphore = asyncio.Semaphore(self.num_workers)
+
+        async def run_task(func: Callable, args: Tuple, kwargs: Dict) -> Any:
+            async with semaphore:
+                return await asyncio.wait_for(
+                    func(*args, **kwargs), timeout=self.task_timeout
+                )
+
+        results = await asyncio.gather(
+            *[run_task(func, args, kwargs) for func, args, kwargs in tasks]
+        )
+        if self.store_results:
+            self._results = list(results)
+
+    def join(self):
+        asyncio.run(self.ajoin())
+
+    def close(self):
+        pass
+
+
+PARTITION_MODES = ("contiguous", "weighted", "round_robin", "hash")
+
+
+def _is_stable_key(key: Any) -> bool:
+    """Check whether str(key) is the same across processes and runs
+    (unlike objects with the default repr, which includes the memory address)"""
+    if key is None or isinstance(key, (str, bytes, int, float)):
+        return True
+    if isinstance(key, (tuple, list)):
+        return all(map(_is_stable_key, key))
+    if isinstance(key, dict):
+        return all(map(_is_stable_key, key.keys())) and all(
+            map(_is_stable_key, key.values())
+        )
+    return False
+
+
+def _get_stable_hash(key: Any) -> int:
+    """Hash that is the same across processes and runs (unlike the built-in hash of str)"""
+    assert _is_stable_key(
+        key
+    ), f"Keys of the hash partition mode must be str, bytes, numbers or their tuples, lists and dicts, but {type(key)} is given. Please set key_func."
+    key_bytes = key if isinstance(key, bytes) else str(key).encode("utf-8")
+    return int.from_bytes(hashlib.md5(key_bytes).digest()[:8], "little")
+
+
+def _partition_by_cost(costs: List[float], num_partitions: int) -> List[List[int]]:
+    """Assign each item to a partition with the greedy LPT (longest processing time first) algorithm,
+    so that the total cost of the partitions is balanced.
+
+    :return: indices of the items in each partition (in ascending order)
+    """
+    partitions: List[List[int]] = [[] for _ in range(num_partitions)]
+    # Min-heap of (total cost, partition index)
+    loads = [(0.0, partition_idx) for partition_idx in range(num_partitions)]
+    for item_idx in sorted(range(len(costs)), key=lambda idx: (-costs[idx], idx)):
+        load, partition_idx = heapq.heappop(loads)
+        partitions[partition_idx].append(item_idx)
+        heapq.heappush(loads, (load + costs[item_idx], partition_idx))
+    return [sorted(partition) for partition in partitions]
 
 
 class PartialProcessor:
@@ -171,17 +1193,56 @@ class PartialProcessor:
     This is a class to process data partially.
     Use this class when you want to call multiple programs in terminal to process data in parallel.
     It will split the data and process the data partially considering the total number of processes and the current process number.
+    The data is always split into exactly total_proc_n partitions (some of them may be empty).
+
+    Partition modes:
+        contiguous: consecutive items with the same number of items (at most one difference) in each partition
+        weighted: balance the total cost of the partitions (greedy LPT), computed by cost_func for each item
+            (e.g., the length of a document). Use this when the processing time of the items is skewed.
+        round_robin: item i goes to partition i % total_proc_n
+        hash: item goes to the partition by the stable hash of key_func(item), so that the same item always goes to
+            the same partition even if the data is reordered or grows (defaults to the item itself).
+            Keys must be str, bytes, numbers or their tuples, lists and dicts
+            (set key_func for other items, e.g., objects with the default repr)
+
+    For dict data, cost_func and key_func are called with each value, and the hash mode uses the key by default.
+
+    example:
+        partial_processor = PartialProcessor(
+            func=process_documents,
+            total_proc_n=8,
+            current_proc_n=args.proc_n,
+            partition_mode="weighted",
+            cost_func=len,
+        )
+        result = partial_processor(documents)
     """
 
+    partition_modes = PARTITION_MODES
+    # Modes whose partitions are consecutive parts of the data (their results are merged by concatenation)
+    _contiguous_partition_modes = ("contiguous",)
+
     def __init__(
         self,
         func: Optional[Callable] = None,
         total_proc_n: Optional[int] = None,
         current_proc_n: Optional[int] = None,
+        partition_mode: str = "contiguous",
+        cost_func: Optional[Callable[[Any], float]] = None,
+        key_func: Optional[Callable[[Any], Any]] = None,
     ):
+        assert (
+            partition_mode in self.partition_modes
+        ), f"partition_mode must be one of {self.partition_modes}, but {partition_mode} is given."
+        assert (
+            partition_mode != "weighted" or cost_func is not None
+        ), f"Please set cost_func to use the weighted partition mode."
         self.func = func
         self.total_proc_n = total_proc_n
         self.current_proc_n = current_proc_n
+        self.partition_mode = partition_mode
+        self.cost_func = cost_func
+        self.key_func = key_func
 
     def __call__(
         self,
@@ -240,43 +1301,276 @@ class PartialProcessor:
         # Get total number of processes and current process number
         total_proc_n = self._get_total_proc_n(total_proc_n)
         current_proc_n = self._get_current_proc_n(current_proc_n)
+        assert (
+            0 <= current_proc_n < total_proc_n
+        ), f"current_proc_n must be in [0, {total_proc_n}), but {current_proc_n} is given."
 
-        # Divide the data into chunks (each chunk will be processed by each process)
-        chunks: List = divide_into_chunks(data, num_chunks=total_proc_n)
-
-        return chunks[current_proc_n]
+        # Select the items of the partition to be processed by the current process
+        indices = self.get_partition_indices(data, total_proc_n=total_proc_n)[
+            current_proc_n
+        ]
+        return self._select(data, indices)
 
     def divide_into_chunks(
         self,
         data: Union[List[Any], Dict],
         total_proc_n: Optional[int] = None,
     ) -> Union[List[Any], Dict]:
+        return [
+            self._select(data, indices)
+            for indices in self.get_partition_indices(data, total_proc_n=total_proc_n)
+        ]
+
+    def get_partition_indices(
+        self,
+        data: Union[List[Any], Dict],
+        total_proc_n: Optional[int] = None,
+    ) -> List[List[int]]:
+        """Get the indices of the items (in ascending order) in each of the total_proc_n partitions"""
         total_proc_n = self._get_total_proc_n(total_proc_n)
-        return divide_into_chunks(data, num_chunks=total_proc_n)
+        num_items = len(data)
+        if self.partition_mode == "contiguous":
+            return divide_into_even_chunks(list(range(num_items)), total_proc_n)
+        if self.partition_mode == "round_robin":
+            return [
+                list(range(partition_idx, num_items, total_proc_n))
+                for partition_idx in range(total_proc_n)
+            ]
+        values = list(data.values()) if isinstance(data, dict) else data
+        if self.partition_mode == "weighted":
+            return _partition_by_cost(
+                [self.cost_func(value) for value in values], total_proc_n
+            )
+        if self.partition_mode == "hash":
+            if self.key_func is not None:
+                keys = [self.key_func(value) for value in values]
+            else:
+                keys = list(data.keys()) if isinstance(data, dict) else data
+            partitions: List[List[int]] = [[] for _ in range(total_proc_n)]
+            for item_idx, key in enumerate(keys):
+                partitions[_get_stable_hash(key) % total_proc_n].append(item_idx)
+            return partitions
+        raise ValueError(
+            f"{self.partition_mode} partition mode is not supported for in-memory data."
+        )
+
+    def _select(
+        self, data: Union[List[Any], Dict], indices: List[int]
+    ) -> Union[List[Any], Dict]:
+        if isinstance(data, dict):
+            items = list(data.items())
+            return dict(items[idx] for idx in indices)
+        return [data[idx] for idx in indices]
 
     def merge(
         self,
         results: List[Any],
         total_proc_n: Optional[int] = None,
+        data: Optional[Union[List[Any], Dict]] = None,
     ) -> List[Any]:
-        """Combine results from each process into a list with correct order."""
+        """Combine results from each process into a list with correct order.
+        Each process should return a list with one result per item of its partition.
+        The original data is required to restore the order for the weighted and hash partition modes.
+        """
 
         # Get total number of processes and current process number
         total_proc_n = self._get_total_proc_n(total_proc_n)
 
-        # Merge the results
+        # Get the results of the partitions in order
         if isinstance(results, list):
             assert type(results[0]) == list, f"results must be list of list type."
-            return do_flatten_list(results)
+            partition_results = results
         elif isinstance(results, dict):
             assert (
                 type(results[0]) == list
             ), f"value stored in the results dictionary must be list type."
-            return do_flatten_list([results[i] for i in range(total_proc_n)])
-        raise ValueError(
-            f"results must be list or dict type, but {type(results)} is given."
+            partition_results = [results[i] for i in range(total_proc_n)]
+        else:
+            raise ValueError(
+                f"results must be list or dict type, but {type(results)} is given."
+            )
+
+        # Merge the results
+        if self.partition_mode in self._contiguous_partition_modes:
+            return do_flatten_list(partition_results)
+        num_items = sum(len(partition) for partition in partition_results)
+        if data is None:
+            assert (
+                self.partition_mode == "round_robin"
+            ), f"Please pass data to merge the results of the {self.partition_mode} partition mode."
+            data = list(range(num_items))
+        merged_results = [None] * num_items
+        partition_indices = self.get_partition_indices(data, total_proc_n=total_proc_n)
+        for indices, partition in zip(partition_indices, partition_results):
+            for idx, result in zip(indices, partition):
+                merged_results[idx] = result
+        return merged_results
+
+
+STREAMING_PARTITION_MODES = ("round_robin", "byte_range", "hash")
+
+
+class StreamingPartialProcessor(PartialProcessor):
+    """
+    PartialProcessor that streams the partition of the current process from an iterable or a file (JSONL or CSV),
+    without loading the full data. The methods for in-memory data (e.g., get_partial_data) split the data
+    the same way in the round_robin and hash modes, and raise ValueError in the byte_range mode. Memory usage scales with the partition size instead of the total size
+    (or stays constant if func consumes the partition lazily).
+    func is called with an iterator over the items of the partition.
+
+    Partition modes:
+        round_robin: every total_proc_n-th item (stride), starting from current_proc_n.
+            For JSONL files, the lines of the other partitions are not parsed.
+        byte_range: the uncompressed file is split into total_proc_n byte ranges aligned to line boundaries,
+            and only the range of the current process is read (the number of items in each partition may differ).
+        hash: item goes to the partition by the stable hash of key_func(item) (defaults to the item itself).
+            Keys must be str, bytes, numbers or their tuples, lists and dicts (as in PartialProcessor)
+
+    example:
+        partial_processor = StreamingPartialProcessor(
+            func=process_records,
+            total_proc_n=8,
+            current_proc_n=args.proc_n,
+            partition_mode="byte_range",
+        )
+        result = partial_processor("data.jsonl")
+    """
+
+    partition_modes = STREAMING_PARTITION_MODES
+    _contiguous_partition_modes = ("byte_range",)
+
+    def __init__(
+        self,
+        func: Optional[Callable] = None,
+        total_proc_n: Optional[int] = None,
+        current_proc_n: Optional[int] = None,
+        partition_mode: str = "round_robin",
+        key_func: Optional[Callable[[Any], Any]] = None,
+    ):
+        super().__init__(
+            func=func,
+            total_proc_n=total_proc_n,
+            current_proc_n=current_proc_n,
+            partition_mode=partition_mode,
+            key_func=key_func,
+        )
+
+    def __call__(
+        self,
+        data: Union[str, os.PathLike, Iterable[Any]],
+        func: Optional[Callable] = None,
+        total_proc_n: Optional[int] = None,
+        current_proc_n: Optional[int] = None,
+        **reader_kwargs,
+    ) -> Any:
+        func = self._get_func(func)
+        partial_data = self.iter_partial_data(
+            data,
+            total_proc_n=total_proc_n,
+            current_proc_n=current_proc_n,
+            **reader_kwargs,
+        )
+        return func(partial_data)
+
+    def iter_partial_data(
+        self,
+        data: Union[str, os.PathLike, Iterable[Any]],
+        total_proc_n: Optional[int] = None,
+        current_proc_n: Optional[int] = None,
+        **reader_kwargs,
+    ) -> Iterator[Any]:
+        """Lazily yield the items of the partition of the current process
+
+        :param data: iterable of items, or path of a JSONL (.jsonl) or CSV (.csv, .tsv) file (optionally compressed)
+        :type data: Union[str, os.PathLike, Iterable[Any]]
+        :param reader_kwargs: keyword arguments for reading the file (e.g., encoding, delimiter, usecols)
+        :yield: items of the partition
+        :rtype: Iterator[Any]
+        """
+        total_proc_n = self._get_total_proc_n(total_proc_n)
+        current_proc_n = self._get_current_proc_n(current_proc_n)
+        assert (
+            0 <= current_proc_n < total_proc_n
+        ), f"current_proc_n must be in [0, {total_proc_n}), but {current_proc_n} is given."
+
+        if not isinstance(data, (str, os.PathLike)):
+            if self.partition_mode == "byte_range":
+                raise ValueError(f"byte_range partition mode requires a file path.")
+            yield from self._select_from_stream(data, total_proc_n, current_proc_n)
+            return None
+
+        import hkkang_utils.file as file_utils
+
+        file_path = os.fspath(data)
+        file_type = self._get_file_type(file_path)
+        if file_type == "tsv":
+            reader_kwargs.setdefault("delimiter", "\t")
+        if self.partition_mode == "byte_range":
+            if file_utils.infer_compression(file_path) is not None:
+                raise ValueError(
+                    f"byte_range partition mode does not support compressed files: {file_path}"
+                )
+            byte_ranges = file_utils.get_line_aligned_byte_ranges(
+                file_path, num_chunks=total_proc_n
+            )
+            # Small files may have fewer ranges than the processes
+            if current_proc_n >= len(byte_ranges):
+                return None
+            start, end = byte_ranges[current_proc_n]
+            if file_type == "jsonl":
+                yield from file_utils.iter_jsonl_byte_range(
+                    file_path, start, end, **reader_kwargs
+                )
+            else:
+                yield from file_utils.iter_csv_byte_range(
+                    file_path, start, end, **reader_kwargs
+                )
+        elif self.partition_mode == "round_robin":
+            # Skip the items of the other partitions while reading the file
+            read_file = (
+                file_utils.iter_jsonl_file
+                if file_type == "jsonl"
+                else file_utils.iter_csv_file
+            )
+            yield from read_file(
+                file_path, skip=current_proc_n, step=total_proc_n, **reader_kwargs
+            )
+        else:
+            read_file = (
+                file_utils.iter_jsonl_file
+                if file_type == "jsonl"
+                else file_utils.iter_csv_file
+            )
+            yield from self._select_from_stream(
+                read_file(file_path, **reader_kwargs), total_proc_n, current_proc_n
+            )
+
+    def _select_from_stream(
+        self, items: Iterable[Any], total_proc_n: int, current_proc_n: int
+    ) -> Iterator[Any]:
+        if self.partition_mode == "round_robin":
+            return itertools.islice(items, current_proc_n, None, total_proc_n)
+        key_func = self.key_func or (lambda item: item)
+        return (
+            item
+            for item in items
+            if _get_stable_hash(key_func(item)) % total_proc_n == current_proc_n
         )
 
+    @staticmethod
+    def _get_file_type(file_path: str) -> str:
+        import hkkang_utils.file as file_utils
+
+        if file_utils.infer_compression(file_path) is not None:
+            file_path = os.path.splitext(file_path)[0]
+        file_type = os.path.splitext(file_path)[1].lstrip(".").lower()
+        assert file_type in (
+            "jsonl",
+            "csv",
+            "tsv",
+        ), f"Only JSONL (.jsonl) and CSV (.csv, .tsv) files are supported, but {file_path} is given."
+        return file_type
+
 
 if __name__ == "__main__":
     pass
@@ -1,13 +1,50 @@
+import array
+import asyncio
+import bz2
+import collections
+import copy
 import csv
+import dataclasses
+import fnmatch
+import functools
+import gzip
 import inspect
+import itertools
+import json
+import lzma
+import math
+import mmap
 import os
 import pathlib
 import pickle
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import re
+import struct
+import tempfile
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import contextmanager
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import omegaconf
 import tqdm
-import ujson
 import yaml
 
 
@@ -34,18 +71,159 @@ def get_files_in_directory(
 
 
 def get_files_in_all_sub_directories(
-    root_dir_path: str, filter_func: Optional[callable] = None
+    root_dir_path: str,
+    filter_func: Optional[callable] = None,
+    pattern: Optional[str] = None,
+    regex: Optional[str] = None,
+    num_workers: int = 1,
+    cache_path: Optional[str] = None,
 ) -> List:
-    """Get paths of files in all sub directories
+    """Get paths of files in all sub directories (see iter_files_in_all_sub_directories for the arguments)
     :return: list of file paths in all sub directories which are valid
     :rtype: list
     """
-    return [
-        os.path.join(dp, f)
-        for dp, dn, filenames in os.walk(root_dir_path)
-        for f in filenames
-        if (filter_func is None or filter_func(f))
-    ]
+    return list(
+        iter_files_in_all_sub_directories(
+            root_dir_path,
+            filter_func=filter_func,
+            pattern=pattern,
+            regex=regex,
+            num_workers=num_workers,
+            cache_path=cache_path,
+        )
+    )
+
+
+def iter_files_in_all_sub_directories(
+    root_dir_path: str,
+    filter_func: Optional[callable] = None,
+    pattern: Optional[str] = None,
+    regex: Optional[str] = None,
+    num_workers: int = 1,
+    cache_path: Optional[str] = None,
+) -> Iterator[str]:
+    """Lazily yield paths of files in all sub directories.
+    Filters are applied to file names only, so no extra stat call is made per file.
+
+    :param root_dir_path: path of the root directory
+    :type root_dir_path: str
+    :param filter_func: function that returns True if the file name is valid
+    :type filter_func: callable
+    :param pattern: glob pattern (e.g., "*.json") that valid file names should match
+    :type pattern: Optional[str], optional
+    :param regex: regular expression that valid file names should contain (i.e., re.search)
+    :type regex: Optional[str], optional
+    :param num_workers: number of threads to scan sub directories concurrently, defaults to 1
+    :type num_workers: int, optional
+    :param cache_path: path of the listing cache. If given, directories whose modification time has not changed
+        are not listed again (the cache is updated once the iteration finishes), defaults to None
+    :type cache_path: Optional[str], optional
+    :yield: file path
+    :rtype: Iterator[str]
+    """
+    filters = []
+    if filter_func is not None:
+        filters.append(filter_func)
+    if pattern is not None:
+        filters.append(re.compile(fnmatch.translate(pattern)).match)
+    if regex is not None:
+        filters.append(re.compile(regex).search)
+
+    cache = _read_listing_cache(cache_path, root_dir_path) if cache_path else None
+    new_cache = {} if cache_path else None
+
+    def list_directory(dir_path: str) -> Dict[str, Any]:
+        listing = _list_directory(dir_path, cache, use_mtime=cache_path is not None)
+        if new_cache is not None and listing["mtime_ns"] is not None:
+            new_cache[dir_path] = listing
+        return listing
+
+    def to_file_paths(dir_path: str, listing: Dict[str, Any]) -> List[str]:
+        return [
+            os.path.join(dir_path, file_name)
+            for file_name in listing["files"]
+            if all(func(file_name) for func in filters)
+        ]
+
+    if num_workers <= 1:
+        dir_paths = [root_dir_path]
+        while dir_paths:
+            dir_path = dir_paths.pop()
+            listing = list_directory(dir_path)
+            yield from to_file_paths(dir_path, listing)
+            dir_paths.extend(
+                os.path.join(dir_path, name) for name in reversed(listing["dirs"])
+            )
+    else:
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            futures = {executor.submit(list_directory, root_dir_path): root_dir_path}
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    dir_path = futures.pop(future)
+                    listing = future.result()
+                    for name in listing["dirs"]:
+                        sub_dir_path = os.path.join(dir_path, name)
+                        futures[executor.submit(list_directory, sub_dir_path)] = (
+                            sub_dir_path
+                        )
+                    yield from to_file_paths(dir_path, listing)
+
+    if cache_path:
+        write_json_file(
+            {"root": root_dir_path, "directories": new_cache},
+            cache_path,
+            indent=0,
+            atomic=True,
+            durable=False,
+        )
+
+
+def _list_directory(
+    dir_path: str,
+    cache: Optional[Dict[str, Dict[str, Any]]] = None,
+    use_mtime: bool = False,
+) -> Dict[str, Any]:
+    """List names of files and sub directories (not following symlinks) in a directory.
+    The cached listing is reused if the modification time of the directory has not changed.
+    """
+    mtime_ns = None
+    if use_mtime:
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return {"mtime_ns": None, "files": [], "dirs": []}
+        cached_listing = cache.get(dir_path) if cache else None
+        if cached_listing and cached_listing["mtime_ns"] == mtime_ns:
+            return cached_listing
+    files, dirs = [], []
+    try:
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    # Same as os.walk: symlinks to directories are not followed
+                    if not entry.is_symlink():
+                        dirs.append(entry.name)
+                else:
+                    files.append(entry.name)
+    except OSError:
+        # Same as os.walk: ignore directories that cannot be listed
+        return {"mtime_ns": None, "files": [], "dirs": []}
+    return {"mtime_ns": mtime_ns, "files": files, "dirs": dirs}
+
+
+def _read_listing_cache(
+    cache_path: str, root_dir_path: str
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        cache = read_json_file(cache_path)
+    except ValueError:
+        return None
+    if cache.get("root") != root_dir_path:
+        return None
+    return cache["directories"]
 
 
 def create_directory(dir_path: str):
@@ -76,6 +254,305 @@ def path_from_current_file(relative_path: str) -> str:
     return os.path.normpath(full_path)
 
 
+# Related to opening files
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zst": "zstd"}
+
+
+def infer_compression(file_path: str) -> Optional[str]:
+    """Infer the compression format from the file extension
+
+    :param file_path: file path
+    :type file_path: str
+    :return: compression format ("gzip", "bz2", "xz" or "zstd"), or None if the file is not compressed
+    :rtype: Optional[str]
+    """
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(file_path)[1].lower())
+
+
+def _strip_compression_extension(file_path: str) -> str:
+    if infer_compression(file_path) is None:
+        return file_path
+    return os.path.splitext(file_path)[0]
+
+
+def _open_file(
+    file_path: str,
+    mode: str = "r",
+    encoding: Optional[str] = None,
+    newline: Optional[str] = None,
+    buffering: int = -1,
+    compression: Optional[str] = "infer",
+    compression_level: Optional[int] = None,
+):
+    """Open a (possibly compressed) file. Text mode is used unless "b" is in the mode
+
+    :param compression: compression format ("gzip", "bz2", "xz" or "zstd"),
+        defaults to "infer" (inferred from the file extension)
+    :type compression: Optional[str], optional
+    :param compression_level: compression level to use when writing, defaults to None (codec default)
+    :type compression_level: Optional[int], optional
+    """
+    if compression == "infer":
+        compression = infer_compression(file_path)
+    is_binary = "b" in mode
+    is_write = any(char in mode for char in "wax")
+    text_kwargs = {} if is_binary else dict(encoding=encoding, newline=newline)
+    if compression is None:
+        return open(file_path, mode, buffering=buffering, **text_kwargs)
+    mode = mode if is_binary else mode.replace("t", "") + "t"
+    if compression == "gzip":
+        level = 9 if compression_level is None else compression_level
+        return gzip.open(file_path, mode, compresslevel=level, **text_kwargs)
+    if compression == "bz2":
+        level = 9 if compression_level is None else compression_level
+        return bz2.open(file_path, mode, compresslevel=level, **text_kwargs)
+    if compression == "xz":
+        preset = compression_level if is_write else None
+        return lzma.open(file_path, mode, preset=preset, **text_kwargs)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Please install zstandard to use zstd compression.")
+        cctx = None
+        if is_write:
+            level = 3 if compression_level is None else compression_level
+            cctx = zstandard.ZstdCompressor(level=level)
+        return zstandard.open(file_path, mode, cctx=cctx, **text_kwargs)
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+# Related to atomic writes
+def _create_temp_path(file_path: str) -> str:
+    """Create an empty temporary file in the same directory as file_path (keeping its extension)"""
+    dir_path, file_name = split_path_into_dir_and_file_name(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix=".", suffix=f".{file_name}")
+    os.close(fd)
+    # mkstemp creates the file with 0600 permission. Use the permission of a regular new (or the existing) file
+    if os.path.exists(file_path):
+        mode = os.stat(file_path).st_mode & 0o777
+    else:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    os.chmod(tmp_path, mode)
+    return tmp_path
+
+
+def _commit_temp_path(tmp_path: str, file_path: str, durable: bool = True) -> None:
+    """Move the temporary file to file_path (fsync the file and the directory if durable)"""
+    if durable:
+        fd = os.open(tmp_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    os.replace(tmp_path, file_path)
+    if durable and hasattr(os, "O_DIRECTORY"):
+        fd = os.open(os.path.dirname(os.path.abspath(file_path)), os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+@contextmanager
+def atomic_write_path(
+    file_path: str, atomic: bool = True, durable: bool = True
+) -> Generator[str, None, None]:
+    """Yield a path to write to, which is moved to file_path only after the block exits without errors.
+    Thus, file_path either keeps its previous content or holds the complete new content,
+    even if the process crashes in the middle of writing.
+
+    :param file_path: destination file path
+    :type file_path: str
+    :param atomic: whether to write atomically (if False, file_path itself is yielded), defaults to True
+    :type atomic: bool, optional
+    :param durable: whether to fsync before/after renaming. Set False to skip fsync for throughput, defaults to True
+    :type durable: bool, optional
+
+    Example:
+        with atomic_write_path("checkpoint.pkl") as tmp_path:
+            torch.save(state_dict, tmp_path)
+    """
+    if not atomic:
+        yield file_path
+        return None
+    tmp_path = _create_temp_path(file_path)
+    try:
+        yield tmp_path
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    _commit_temp_path(tmp_path, file_path, durable=durable)
+
+
+# Related to json backends
+@dataclasses.dataclass(frozen=True)
+class JsonBackend:
+    """JSON library used by the json/jsonl functions of this module"""
+
+    name: str
+    loads: Callable[[Union[str, bytes]], Any]
+    # dumps(obj, indent: Optional[int] = None, ensure_ascii: bool = False) -> str
+    dumps: Callable[..., str]
+
+
+def _json_default(obj: Any) -> Any:
+    """Convert objects that are not JSON serializable by default (e.g., NumPy arrays and dataclasses)"""
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, "tolist"):
+        # NumPy arrays and scalars
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _has_non_finite_float(obj: Any) -> bool:
+    """Check whether obj contains NaN or Infinity (including in NumPy arrays and dataclasses)"""
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_non_finite_float(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_non_finite_float(value) for value in obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return _has_non_finite_float(dataclasses.asdict(obj))
+    if getattr(getattr(obj, "dtype", None), "kind", None) in ("f", "c"):
+        import numpy as np
+
+        return not np.isfinite(obj).all()
+    return False
+
+
+def _create_stdlib_json_backend() -> JsonBackend:
+    def dumps(obj: Any, indent: Optional[int] = None, ensure_ascii: bool = False):
+        return json.dumps(
+            obj, indent=indent, ensure_ascii=ensure_ascii, default=_json_default
+        )
+
+    return JsonBackend(name="json", loads=json.loads, dumps=dumps)
+
+
+def _create_ujson_backend() -> JsonBackend:
+    import ujson
+
+    def dumps(obj: Any, indent: Optional[int] = None, ensure_ascii: bool = False):
+        return ujson.dumps(
+            obj, indent=indent or 0, ensure_ascii=ensure_ascii, default=_json_default
+        )
+
+    return JsonBackend(name="ujson", loads=ujson.loads, dumps=dumps)
+
+
+def _create_orjson_backend() -> JsonBackend:
+    import orjson
+
+    # Use the next fast backend for what orjson does not support
+    # (stdlib json falls back to its pure-Python encoder when indent is set)
+    try:
+        fallback_backend = _create_ujson_backend()
+    except ImportError:
+        fallback_backend = _create_stdlib_json_backend()
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    # Integer literals with 20 or more digits may exceed 64 bits, which orjson parses as floats.
+    # Digit runs are found by mapping digits to "0" and other bytes to " " (faster than a regex)
+    digit_table = bytes(48 if 48 <= byte < 58 else 32 for byte in range(256))
+    long_digit_run = b"0" * 20
+
+    def dumps(obj: Any, indent: Optional[int] = None, ensure_ascii: bool = False):
+        # orjson only supports 2-space indentation and always outputs UTF-8
+        if ensure_ascii or indent not in (None, 0, 2):
+            return fallback_backend.dumps(obj, indent=indent, ensure_ascii=ensure_ascii)
+        indent_option = orjson.OPT_INDENT_2 if indent else 0
+        try:
+            dumped = orjson.dumps(
+                obj, default=_json_default, option=option | indent_option
+            )
+        except TypeError:
+            # e.g., integers exceeding 64 bits
+            return fallback_backend.dumps(obj, indent=indent)
+        # orjson writes non-finite floats (NaN and Infinity) as null
+        if b"null" in dumped and _has_non_finite_float(obj):
+            return fallback_backend.dumps(obj, indent=indent)
+        return dumped.decode("utf-8")
+
+    def loads(data: Union[str, bytes]) -> Any:
+        data_bytes = data.encode("utf-8") if isinstance(data, str) else bytes(data)
+        if long_digit_run in data_bytes.translate(digit_table):
+            return fallback_backend.loads(data)
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # e.g., NaN and Infinity written by the other backends
+            return fallback_backend.loads(data)
+
+    return JsonBackend(name="orjson", loads=loads, dumps=dumps)
+
+
+# Backends in the order of preference
+JSON_BACKEND_FACTORIES: Dict[str, Callable[[], JsonBackend]] = {
+    "orjson": _create_orjson_backend,
+    "ujson": _create_ujson_backend,
+    "json": _create_stdlib_json_backend,
+}
+_json_backends: Dict[Optional[str], JsonBackend] = {}
+_default_json_backend_name: Optional[str] = None
+
+
+def register_json_backend(name: str, factory: Callable[[], JsonBackend]) -> None:
+    """Register a json backend. The factory should raise ImportError if the backend is not available
+
+    :param name: name of the backend
+    :type name: str
+    :param factory: function that creates the backend
+    :type factory: Callable[[], JsonBackend]
+    """
+    JSON_BACKEND_FACTORIES[name] = factory
+    _json_backends.pop(name, None)
+    _json_backends.pop(None, None)
+
+
+def get_json_backend(name: Optional[str] = None) -> JsonBackend:
+    """Get a json backend
+
+    :param name: name of the backend, defaults to None
+        (the backend set by set_json_backend, or the first available one among orjson, ujson and json)
+    :type name: Optional[str], optional
+    :return: json backend
+    :rtype: JsonBackend
+    """
+    name = name or _default_json_backend_name
+    if name is None:
+        if None not in _json_backends:
+            # Cache the first available backend
+            for candidate in JSON_BACKEND_FACTORIES:
+                try:
+                    _json_backends[None] = get_json_backend(candidate)
+                    break
+                except ImportError:
+                    continue
+        return _json_backends[None]
+    if name not in _json_backends:
+        if name not in JSON_BACKEND_FACTORIES:
+            raise ValueError(f"Unknown json backend: {name}")
+        _json_backends[name] = JSON_BACKEND_FACTORIES[name]()
+    return _json_backends[name]
+
+
+def set_json_backend(name: Optional[str]) -> None:
+    """Set the json backend used by the json/jsonl functions of this module
+
+    :param name: name of the backend (None to select the first available one)
+    :type name: Optional[str]
+    """
+    global _default_json_backend_name
+    if name is not None:
+        # Check if the backend is available
+        get_json_backend(name)
+    _default_json_backend_name = name
+
+
 # Related to json files
 def read_json_file(
     file_path: str,
@@ -89,16 +566,179 @@ def read_json_file(
     :return: json data
     :rtype: dict
     """
-    if auto_detect_extension and file_path.endswith(".jsonl"):
+    if auto_detect_extension and _strip_compression_extension(file_path).endswith(
+        ".jsonl"
+    ):
         return read_jsonl_file(file_path, encoding=encoding)
     else:
-        with open(file_path, "r", encoding=encoding) as f:
-            return ujson.load(f)
+        with _open_file(file_path, "r", encoding=encoding) as f:
+            return get_json_backend().loads(f.read())
+
+
+def iter_jsonl_file(
+    file_path: str,
+    encoding: Optional[str] = None,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    step: int = 1,
+) -> Iterator[Any]:
+    """Lazily read a jsonl file, one record at a time (memory usage stays constant)
+
+    :param file_path: jsonl file path
+    :type file_path: str
+    :param skip: number of records to skip from the beginning, defaults to 0
+    :type skip: int, optional
+    :param limit: maximum number of records to yield, defaults to None (no limit)
+    :type limit: Optional[int], optional
+    :param step: yield every step-th record after skip (other lines are not parsed), defaults to 1
+    :type step: int, optional
+    :yield: parsed record of each line
+    :rtype: Iterator[Any]
+    """
+    loads = get_json_backend().loads
+    with _open_file(file_path, "r", encoding=encoding) as f:
+        lines = (line for line in f if line.strip())
+        stop = None if limit is None else skip + limit * step
+        for line in itertools.islice(lines, skip, stop, step):
+            yield loads(line)
+
+
+def _iter_lines_in_byte_range(
+    file_path: str, start: int, end: int
+) -> Iterator[Tuple[int, bytes]]:
+    """Lazily yield (offset, line) of the lines starting within [start, end) of an uncompressed file.
+    start should be aligned to the start of a line (see get_line_aligned_byte_ranges).
+    """
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        offset = start
+        while offset < end:
+            line = f.readline()
+            if not line:
+                break
+            yield offset, line
+            offset += len(line)
+
+
+def iter_jsonl_byte_range(
+    file_path: str, start: int, end: int, encoding: Optional[str] = None
+) -> Iterator[Any]:
+    """Lazily read the records of a jsonl file within a byte range (memory usage stays constant)
+
+    :param file_path: uncompressed jsonl file path
+    :type file_path: str
+    :param start: start byte offset aligned to the start of a line (see get_line_aligned_byte_ranges)
+    :type start: int
+    :param end: end byte offset (exclusive)
+    :type end: int
+    :yield: parsed record of each line
+    :rtype: Iterator[Any]
+    """
+    loads = get_json_backend().loads
+    for _, line in _iter_lines_in_byte_range(file_path, start, end):
+        if line.strip():
+            yield loads(line if encoding is None else line.decode(encoding))
 
 
-def read_jsonl_file(file_path: str, encoding: Optional[str] = None) -> Dict:
-    with open(file_path, "r", encoding=encoding) as f:
-        return [ujson.loads(line) for line in f.readlines()]
+def read_jsonl_file(
+    file_path: str,
+    encoding: Optional[str] = None,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    num_workers: int = 1,
+) -> List[Any]:
+    """Read a jsonl file
+
+    :param file_path: jsonl file path
+    :type file_path: str
+    :param num_workers: number of processes used to parse the file, defaults to 1.
+        When larger than 1, the file is split into byte ranges aligned to line boundaries
+        and each range is parsed in a separate process (compressed files are always parsed in a single process).
+    :type num_workers: int, optional
+    :return: list of records (in the original order)
+    :rtype: List[Any]
+    """
+    if num_workers <= 1 or infer_compression(file_path) is not None:
+        return list(
+            iter_jsonl_file(file_path, encoding=encoding, skip=skip, limit=limit)
+        )
+    # Parse byte ranges in parallel (more ranges than workers for load balancing)
+    byte_ranges = collections.deque(
+        get_line_aligned_byte_ranges(file_path, num_chunks=num_workers * 4)
+    )
+    stop = None if limit is None else skip + limit
+    records = []
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = collections.deque()
+        # Submit the ranges in order with a bounded number in flight,
+        # so that the rest of the file is not read once skip + limit records are collected
+        while byte_ranges or futures:
+            while byte_ranges and len(futures) < num_workers * 2:
+                start, end = byte_ranges.popleft()
+                futures.append(
+                    executor.submit(
+                        _read_jsonl_byte_range,
+                        file_path,
+                        start,
+                        end,
+                        encoding,
+                        get_json_backend().name,
+                    )
+                )
+            records.extend(futures.popleft().result())
+            if stop is not None and len(records) >= stop:
+                for future in futures:
+                    future.cancel()
+                break
+    return records[skip:stop]
+
+
+def get_line_aligned_byte_ranges(
+    file_path: str, num_chunks: int
+) -> List[Tuple[int, int]]:
+    """Split a file into (at most) num_chunks byte ranges whose boundaries are aligned to the start of a line
+
+    :param file_path: file path
+    :type file_path: str
+    :param num_chunks: number of ranges to split the file into
+    :type num_chunks: int
+    :return: list of (start, end) byte offsets, ordered by start offset
+    :rtype: List[Tuple[int, int]]
+    """
+    file_size = os.path.getsize(file_path)
+    boundaries = [0]
+    with open(file_path, "rb") as f:
+        for chunk_idx in range(1, num_chunks):
+            offset = file_size * chunk_idx // num_chunks
+            if offset <= boundaries[-1]:
+                continue
+            # Move to the start of the next line
+            f.seek(offset - 1)
+            f.readline()
+            boundaries.append(min(f.tell(), file_size))
+    boundaries.append(file_size)
+    return [
+        (start, end)
+        for start, end in zip(boundaries[:-1], boundaries[1:])
+        if start < end
+    ]
+
+
+def _read_jsonl_byte_range(
+    file_path: str,
+    start: int,
+    end: int,
+    encoding: Optional[str] = None,
+    json_backend_name: Optional[str] = None,
+) -> List[Any]:
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    lines = [line for line in data.split(b"\n") if line.strip()]
+    if encoding is not None:
+        lines = [line.decode(encoding) for line in lines]
+    loads = get_json_backend(json_backend_name).loads
+    return [loads(line) for line in lines]
 
 
 def write_json_file(
@@ -108,31 +748,300 @@ def write_json_file(
     auto_detect_extension: bool = False,
     encoding: Optional[str] = None,
     ensure_ascii: Optional[bool] = False,
+    compression_level: Optional[int] = None,
+    atomic: bool = False,
+    durable: bool = True,
 ) -> None:
-    if auto_detect_extension and file_path.endswith(".jsonl"):
+    if auto_detect_extension and _strip_compression_extension(file_path).endswith(
+        ".jsonl"
+    ):
         return write_jsonl_file(
-            dict_object=dict_object,
+            list_of_dict_object=dict_object,
             file_path=file_path,
             encoding=encoding,
             ensure_ascii=ensure_ascii,
+            compression_level=compression_level,
+            atomic=atomic,
+            durable=durable,
         )
     else:
-        with open(file_path, "w", encoding=encoding) as f:
-            ujson.dump(dict_object, f, indent=indent, ensure_ascii=ensure_ascii)
+        with atomic_write_path(file_path, atomic, durable) as path, _open_file(
+            path, "w", encoding=encoding, compression_level=compression_level
+        ) as f:
+            f.write(
+                get_json_backend().dumps(
+                    dict_object, indent=indent, ensure_ascii=ensure_ascii
+                )
+            )
 
 
 def write_jsonl_file(
-    list_of_dict_object: List[Dict],
+    list_of_dict_object: Iterable[Dict],
     file_path: str,
     encoding: Optional[str] = None,
     ensure_ascii: Optional[bool] = False,
+    compression_level: Optional[int] = None,
+    atomic: bool = False,
+    durable: bool = True,
 ):
-    with open(file_path, "w", encoding=encoding) as f:
-        for dict_line in list_of_dict_object:
-            f.write(f"{ujson.dumps(dict_line, ensure_ascii=ensure_ascii)}\n")
+    with JsonlWriter(
+        file_path,
+        encoding=encoding,
+        ensure_ascii=ensure_ascii,
+        compression_level=compression_level,
+        atomic=atomic,
+        durable=durable,
+    ) as writer:
+        writer.write_all(list_of_dict_object)
+
+
+class JsonlWriter:
+    """Write records into a jsonl file incrementally.
+    Records are buffered and written in batches, so memory usage is bounded by buffer_size.
+    The file is compressed if its extension is one of COMPRESSION_EXTENSIONS (e.g., "output.jsonl.gz").
+    With atomic=True, records are written to a temporary file which replaces file_path on close
+    (or is discarded if an exception is raised within the with block).
+
+    Example:
+        with JsonlWriter("output.jsonl") as writer:
+            for record in generate_records():
+                writer.write(record)
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        encoding: Optional[str] = None,
+        ensure_ascii: Optional[bool] = False,
+        buffer_size: int = 1000,
+        append: bool = False,
+        compression_level: Optional[int] = None,
+        atomic: bool = False,
+        durable: bool = True,
+    ):
+        assert (
+            buffer_size > 0
+        ), f"buffer_size must be positive, but {buffer_size} is given."
+        assert not (append and atomic), "append mode cannot be used with atomic mode."
+        self.file_path = file_path
+        self.encoding = encoding
+        self.ensure_ascii = ensure_ascii
+        self.buffer_size = buffer_size
+        self.append = append
+        self.compression_level = compression_level
+        self.atomic = atomic
+        self.durable = durable
+        self.num_written = 0
+        self._buffer: List[str] = []
+        self._file = None
+        self._tmp_path: Optional[str] = None
+        self._dumps = get_json_backend().dumps
+
+    def __enter__(self) -> "JsonlWriter":
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        if exc_type is not None and self.atomic:
+            self.abort()
+        else:
+            self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+
+    def open(self) -> "JsonlWriter":
+        if self.closed:
+            mode = "a" if self.append else "w"
+            self._tmp_path = _create_temp_path(self.file_path) if self.atomic else None
+            self._file = _open_file(
+                self._tmp_path or self.file_path,
+                mode,
+                encoding=self.encoding,
+                compression_level=self.compression_level,
+            )
+        return self
+
+    def write(self, record: Any) -> None:
+        self.open()
+        self._buffer.append(f"{self._dumps(record, ensure_ascii=self.ensure_ascii)}\n")
+        self.num_written += 1
+        if len(self._buffer) >= self.buffer_size:
+            self._write_buffer()
+
+    def write_all(self, records: Iterable[Any]) -> None:
+        for record in records:
+            self.write(record)
+
+    def flush(self) -> None:
+        """Write the buffered records and flush the file handle"""
+        if self.closed:
+            return None
+        self._write_buffer()
+        self._file.flush()
+
+    def close(self) -> None:
+        if self.closed:
+            return None
+        self.flush()
+        self._file.close()
+        self._file = None
+        if self._tmp_path is not None:
+            _commit_temp_path(self._tmp_path, self.file_path, durable=self.durable)
+            self._tmp_path = None
+
+    def abort(self) -> None:
+        """Close the file without writing the buffered records (discard the temporary file in atomic mode)"""
+        if self.closed:
+            return None
+        self._buffer = []
+        self._file.close()
+        self._file = None
+        if self._tmp_path is not None:
+            os.remove(self._tmp_path)
+            self._tmp_path = None
+
+    def _write_buffer(self) -> None:
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._buffer = []
+
+
+class JsonlIndex:
+    """Random access to the records of a jsonl file via a byte-offset index.
+
+    The index (uint64 offset of each record) is persisted as a sidecar file (default: "{file_path}.idx")
+    and rebuilt automatically when the size or modification time of the jsonl file changes.
+    Records are read from a memory-mapped file, so only the requested records are parsed.
+
+    Example:
+        with JsonlIndex("data.jsonl") as index:
+            num_records = len(index)
+            record = index[1000]
+            records = index[10:20]
+    """
+
+    _header_format = "<QQ"  # (mtime_ns, file size) of the indexed file
+
+    def __init__(
+        self,
+        file_path: str,
+        index_path: Optional[str] = None,
+        encoding: Optional[str] = None,
+        persist: bool = True,
+    ):
+        self.file_path = file_path
+        self.index_path = index_path if index_path else f"{file_path}.idx"
+        self.encoding = encoding
+        self.persist = persist
+        self._file = None
+        self._mmap = None
+        self._offsets = None
+        self.open()
+
+    def __enter__(self) -> "JsonlIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __iter__(self) -> Iterator[Any]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __getitem__(self, idx: Union[int, slice]) -> Any:
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        return self._parse(self.get_raw(idx))
+
+    def get_raw(self, idx: int) -> bytes:
+        """Get the raw bytes of the idx-th record (without parsing)"""
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f"Index {idx} is out of range for {len(self)} records.")
+        start = self._offsets[idx]
+        end = self._mmap.find(b"\n", start)
+        return self._mmap[start : end if end != -1 else len(self._mmap)]
+
+    def open(self) -> "JsonlIndex":
+        if self._mmap is not None:
+            return self
+        if infer_compression(self.file_path) is not None:
+            raise ValueError(
+                f"Compressed files cannot be indexed for random access: {self.file_path}"
+            )
+        self._offsets = self._load_index() if self.persist else None
+        if self._offsets is None:
+            self._offsets = self._build_index()
+            if self.persist:
+                self._save_index(self._offsets)
+        if len(self._offsets) > 0:
+            self._file = open(self.file_path, "rb")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # Empty file cannot be memory-mapped
+            self._mmap = b""
+        return self
+
+    def close(self) -> None:
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._mmap = None
+
+    def _parse(self, raw_record: bytes) -> Any:
+        if self.encoding is not None:
+            raw_record = raw_record.decode(self.encoding)
+        return get_json_backend().loads(raw_record)
+
+    def _file_signature(self) -> Tuple[int, int]:
+        stat = os.stat(self.file_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _build_index(self) -> array.array:
+        offsets = array.array("Q")
+        offset = 0
+        with open(self.file_path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    offsets.append(offset)
+                offset += len(line)
+        return offsets
+
+    def _load_index(self) -> Optional[array.array]:
+        """Load the persisted index, if it exists and is up-to-date"""
+        header_size = struct.calcsize(self._header_format)
+        if not os.path.exists(self.index_path):
+            return None
+        with open(self.index_path, "rb") as f:
+            header = f.read(header_size)
+            if len(header) != header_size:
+                return None
+            if struct.unpack(self._header_format, header) != self._file_signature():
+                return None
+            offsets = array.array("Q")
+            offsets.frombytes(f.read())
+        return offsets
+
+    def _save_index(self, offsets: array.array) -> None:
+        with atomic_write_path(self.index_path, durable=False) as tmp_path:
+            with open(tmp_path, "wb") as f:
+                f.write(struct.pack(self._header_format, *self._file_signature()))
+                offsets.tofile(f)
 
 
 # Related to yaml files
+# Use the libyaml-based C implementations when available (much faster than the pure-Python ones)
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YamlDumper = getattr(yaml, "CDumper", yaml.Dumper)
+
+
 def read_yaml_file(file_path: str) -> Dict:
     """Read a yaml file
 
@@ -141,56 +1050,537 @@ def read_yaml_file(file_path: str) -> Dict:
     :return: yaml data
     :rtype: dict
     """
-    with open(file_path, "r") as stream:
+    with _open_file(file_path, "r") as stream:
         try:
-            return yaml.safe_load(stream)
+            return yaml.load(stream, Loader=YamlLoader)
         except yaml.YAMLError as exc:
             print(exc)
             return None
 
 
-def write_yaml_file(dict_object: dict, file_path: str) -> None:
-    with open(file_path, "w") as yaml_file:
-        yaml.dump(dict_object, yaml_file, default_flow_style=False)
+def iter_yaml_documents(file_path: str) -> Iterator[Any]:
+    """Lazily read a multi-document yaml file (documents separated by "---"), one document at a time
+
+    :param file_path: yaml file path
+    :type file_path: str
+    :yield: yaml data of each document
+    :rtype: Iterator[Any]
+    """
+    with _open_file(file_path, "r") as stream:
+        yield from yaml.load_all(stream, Loader=YamlLoader)
+
+
+def write_yaml_file(
+    dict_object: dict,
+    file_path: str,
+    compression_level: Optional[int] = None,
+    atomic: bool = False,
+    durable: bool = True,
+) -> None:
+    with atomic_write_path(file_path, atomic, durable) as path, _open_file(
+        path, "w", compression_level=compression_level
+    ) as yaml_file:
+        yaml.dump(dict_object, yaml_file, Dumper=YamlDumper, default_flow_style=False)
+
+
+def write_yaml_documents(
+    documents: Iterable[Any],
+    file_path: str,
+    compression_level: Optional[int] = None,
+    atomic: bool = False,
+    durable: bool = True,
+) -> None:
+    """Write documents into a multi-document yaml file. Documents are consumed lazily
+
+    :param documents: documents to write
+    :type documents: Iterable[Any]
+    :param file_path: yaml file path
+    :type file_path: str
+    """
+    with atomic_write_path(file_path, atomic, durable) as path, _open_file(
+        path, "w", compression_level=compression_level
+    ) as yaml_file:
+        yaml.dump_all(documents, yaml_file, Dumper=YamlDumper, default_flow_style=False)
 
 
 # Related to pickle files
-def write_pickle_file(object_to_save, file_path: str) -> None:
+PICKLE_BUFFER_ALIGNMENT = 64
+# Out-of-band pickle files start with the magic and a token that is also written in the header of the sidecar file,
+# so that a pickle file and a sidecar file of different writes are not loaded together
+PICKLE_OUT_OF_BAND_MAGIC = b"\0HKOOB\0"
+PICKLE_OUT_OF_BAND_TOKEN_SIZE = 16
+
+
+def get_pickle_buffers_path(file_path: str) -> str:
+    """Get the path of the sidecar file that stores out-of-band buffers of a pickle file"""
+    return f"{file_path}.buffers"
+
+
+def write_pickle_file(
+    object_to_save,
+    file_path: str,
+    compression_level: Optional[int] = None,
+    atomic: bool = False,
+    durable: bool = True,
+    protocol: Optional[int] = None,
+    out_of_band: bool = False,
+    out_of_band_threshold: int = 1024 * 1024,
+) -> None:
     """Write a pickle file
 
     :param object_to_save: object to save
     :type object_to_save: any
     :param file_path: pickle file path
     :type file_path: str
+    :param compression_level: compression level to use if the file is compressed, defaults to None
+    :type compression_level: Optional[int], optional
+    :param atomic: write to a temporary file and rename it to file_path when done, defaults to False
+    :type atomic: bool, optional
+    :param durable: fsync the file before renaming (only used with atomic), defaults to True
+    :type durable: bool, optional
+    :param protocol: pickle protocol, defaults to None (pickle.DEFAULT_PROTOCOL, or 5 if out_of_band)
+    :type protocol: Optional[int], optional
+    :param out_of_band: store large buffers (e.g., of NumPy arrays) out-of-band with pickle protocol 5
+        in an uncompressed sidecar file (see get_pickle_buffers_path), which read_pickle_file memory-maps
+        to load the buffers without copying them. The file can be read only with read_pickle_file, defaults to False
+    :type out_of_band: bool, optional
+    :param out_of_band_threshold: minimum size (in bytes) of a buffer to store out-of-band, defaults to 1MB
+    :type out_of_band_threshold: int, optional
     """
-    with open(file_path, "wb") as f:
-        pickle.dump(object_to_save, f)
-
-
-def read_pickle_file(file_path: str) -> any:
+    buffers_path = get_pickle_buffers_path(file_path)
+    if not out_of_band:
+        with atomic_write_path(file_path, atomic, durable) as path, _open_file(
+            path, "wb", compression_level=compression_level
+        ) as f:
+            pickle.dump(object_to_save, f, protocol=protocol)
+        # Remove stale out-of-band buffers of the previous content
+        if os.path.exists(buffers_path):
+            os.remove(buffers_path)
+        return None
+
+    # Collect large buffers (buffers are kept in-band if the callback returns True)
+    buffers: List[memoryview] = []
+
+    def buffer_callback(buffer: pickle.PickleBuffer) -> bool:
+        raw_buffer = buffer.raw()
+        if raw_buffer.nbytes < out_of_band_threshold:
+            return True
+        buffers.append(raw_buffer)
+        return False
+
+    # The pickle and the sidecar are renamed separately in atomic mode, so they are paired by a random token
+    token = os.urandom(PICKLE_OUT_OF_BAND_TOKEN_SIZE)
+    with atomic_write_path(file_path, atomic, durable) as path:
+        with _open_file(path, "wb", compression_level=compression_level) as f:
+            f.write(PICKLE_OUT_OF_BAND_MAGIC + token)
+            pickle.dump(
+                object_to_save,
+                f,
+                protocol=5 if protocol is None else protocol,
+                buffer_callback=buffer_callback,
+            )
+        with atomic_write_path(buffers_path, atomic, durable) as tmp_buffers_path:
+            _write_pickle_buffers(buffers, tmp_buffers_path, token)
+
+
+def read_pickle_file(file_path: str, mmap_buffers: bool = True) -> any:
     """Read a pickle file
 
     :param file_path: pickle file path
     :type file_path: str
+    :param mmap_buffers: memory-map the out-of-band buffers (if any) instead of reading them into memory.
+        Memory-mapped buffers are copy-on-write, so modifying the loaded arrays does not change the file, defaults to True
+    :type mmap_buffers: bool, optional
     :return: object
     :rtype: any
     """
-    with open(file_path, "rb") as f:
+    with _open_file(file_path, "rb") as f:
+        magic = f.read(len(PICKLE_OUT_OF_BAND_MAGIC))
+        if magic == PICKLE_OUT_OF_BAND_MAGIC:
+            token = f.read(PICKLE_OUT_OF_BAND_TOKEN_SIZE)
+            buffers = _read_pickle_buffers(
+                get_pickle_buffers_path(file_path), token, use_mmap=mmap_buffers
+            )
+            return pickle.load(f, buffers=buffers)
+    # Pickle without out-of-band buffers (the file is reopened, as compressed files may not support seeking)
+    with _open_file(file_path, "rb") as f:
         return pickle.load(f)
 
 
+def _write_pickle_buffers(
+    buffers: List[memoryview], file_path: str, token: bytes
+) -> None:
+    """Write buffers with a header of the token and (offset, length) of each buffer.
+    Offsets are aligned to PICKLE_BUFFER_ALIGNMENT"""
+    header_size = (
+        len(token) + struct.calcsize("<Q") + struct.calcsize("<QQ") * len(buffers)
+    )
+    offsets, offset = [], header_size
+    for buffer in buffers:
+        offset += -offset % PICKLE_BUFFER_ALIGNMENT
+        offsets.append(offset)
+        offset += buffer.nbytes
+    with open(file_path, "wb") as f:
+        f.write(token)
+        f.write(struct.pack("<Q", len(buffers)))
+        for offset, buffer in zip(offsets, buffers):
+            f.write(struct.pack("<QQ", offset, buffer.nbytes))
+        for offset, buffer in zip(offsets, buffers):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(buffer)
+
+
+def _read_pickle_buffers(
+    file_path: str, token: bytes, use_mmap: bool = True
+) -> List[memoryview]:
+    with open(file_path, "rb") as f:
+        if f.read(len(token)) != token:
+            raise ValueError(
+                f"{file_path} does not hold the out-of-band buffers of the pickle file (written by another write)."
+            )
+        (num_buffers,) = struct.unpack("<Q", f.read(struct.calcsize("<Q")))
+        entry_size = struct.calcsize("<QQ")
+        entries = [struct.unpack("<QQ", f.read(entry_size)) for _ in range(num_buffers)]
+        if num_buffers == 0:
+            return []
+        if use_mmap:
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+        else:
+            data = memoryview(bytearray(os.fstat(f.fileno()).st_size))
+            f.seek(0)
+            f.readinto(data)
+    return [data[offset : offset + length] for offset, length in entries]
+
+
+# Related to columnar record files
+RECORDS_META_FILE_NAME = "meta.json"
+
+
+def _to_columns(
+    records: Union[List[Dict[str, Any]], Dict[str, List[Any]]],
+) -> Dict[str, List[Any]]:
+    """Convert a list of dicts into a dict of columns (missing values are filled with None)"""
+    if isinstance(records, dict):
+        return records
+    names = list(dict.fromkeys(key for record in records for key in record))
+    return {name: [record.get(name) for record in records] for name in names}
+
+
+# Kinds of NumPy dtypes that keep the values of each Python type
+_NUMPY_KINDS = {bool: "b", int: "iu", float: "f"}
+
+
+def _get_column_kind(values: List[Any]) -> str:
+    """Get how to store a column: "numpy" (fixed-size values), "str" or "json" (any other values)"""
+    if values and all(type(value) is str for value in values):
+        return "str"
+    # Mixing types (e.g., int and float) would change the values (e.g., 1 would be read as 1.0)
+    if values and len(set(type(value) for value in values)) == 1:
+        if type(values[0]) in (bool, int, float):
+            return "numpy"
+    return "json"
+
+
+def write_records(
+    records: Union[List[Dict[str, Any]], Dict[str, List[Any]]],
+    path: str,
+    format: str = "auto",
+) -> None:
+    """Write a list of dicts (or a dict of columns) in a columnar binary format,
+    which is much faster to reload than json and supports reading only a subset of columns.
+
+    Two formats are supported:
+        - "arrow": a single Arrow IPC file (requires pyarrow).
+            Columns that Arrow cannot keep as they are (e.g., integers exceeding 64 bits or mixing int and float)
+            are stored in the same way as the "numpy" format.
+        - "numpy": a directory with a .npy file per column and a meta file.
+            Numeric and boolean columns are stored as NumPy arrays, string columns as UTF-8 bytes with offsets,
+            integer columns exceeding 64 bits as decimal strings,
+            and any other columns (e.g., nested, with missing values or mixing int and float) as json strings.
+
+    :param records: list of dicts, or a dict of columns (column name -> list of values)
+    :type records: Union[List[Dict[str, Any]], Dict[str, List[Any]]]
+    :param path: file path ("arrow") or directory path ("numpy")
+    :type path: str
+    :param format: "arrow", "numpy" or "auto" ("arrow" if pyarrow is installed, otherwise "numpy"), defaults to "auto"
+    :type format: str, optional
+    """
+    if format == "auto":
+        try:
+            import pyarrow  # noqa: F401
+
+            format = "arrow"
+        except ImportError:
+            format = "numpy"
+    if format == "arrow":
+        import pyarrow as pa
+
+        table = _to_arrow_table(_to_columns(records))
+        with atomic_write_path(path, durable=False) as tmp_path:
+            with pa.OSFile(tmp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+    elif format == "numpy":
+        _write_numpy_records(_to_columns(records), path)
+    else:
+        raise ValueError(f"Unsupported format: {format}")
+
+
+def read_records(
+    path: str,
+    columns: Optional[List[str]] = None,
+    as_columns: bool = False,
+    memory_map: bool = True,
+) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+    """Read records written by write_records (the format is detected from the path)
+
+    :param path: file path ("arrow") or directory path ("numpy")
+    :type path: str
+    :param columns: names of the columns to read, defaults to None (all columns)
+    :type columns: Optional[List[str]], optional
+    :param as_columns: return a dict of columns instead of a list of dicts.
+        Numeric columns are returned as NumPy arrays (without copying, if memory-mapped), defaults to False
+    :type as_columns: bool, optional
+    :param memory_map: memory-map the data instead of reading it into memory, defaults to True
+    :type memory_map: bool, optional
+    :return: list of dicts, or a dict of columns
+    :rtype: Union[List[Dict[str, Any]], Dict[str, Any]]
+    """
+    if os.path.isdir(path):
+        data = _read_numpy_records(path, columns=columns, memory_map=memory_map)
+    else:
+        data = _read_arrow_records(path, columns=columns, memory_map=memory_map)
+    if as_columns:
+        return data
+    names = list(data.keys())
+    values = [
+        column.tolist() if hasattr(column, "tolist") else column
+        for column in data.values()
+    ]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def _is_identical(value: Any, other: Any) -> bool:
+    """Check whether two values are equal and of the same types (lists and tuples are not distinguished)"""
+    if isinstance(value, (list, tuple)):
+        return (
+            isinstance(other, (list, tuple))
+            and len(value) == len(other)
+            and all(map(_is_identical, value, other))
+        )
+    if type(value) is not type(other):
+        return False
+    if isinstance(value, dict):
+        return value.keys() == other.keys() and all(
+            _is_identical(item, other[key]) for key, item in value.items()
+        )
+    if isinstance(value, float) and value != value:
+        return other != other
+    return value == other
+
+
+def _to_arrow_table(columns: Dict[str, List[Any]]) -> Any:
+    import pyarrow as pa
+
+    dumps = get_json_backend().dumps
+    arrays, fields = [], []
+    for name, values in columns.items():
+        values = list(values)
+        kind = _get_column_kind(values)
+        try:
+            array = pa.array(values)
+        except (pa.ArrowException, OverflowError):
+            array = None
+        # Arrow converts the values of other columns to a common type (e.g., 1 to 1.0, or missing keys to None)
+        if array is None or (
+            kind == "json" and not _is_identical(array.to_pylist(), values)
+        ):
+            if kind == "numpy" and type(values[0]) is int:
+                kind, values = "bigint", [str(value) for value in values]
+            else:
+                kind, values = "json", [dumps(value) for value in values]
+            array = pa.array(values, type=pa.string())
+            fields.append(pa.field(name, array.type, metadata={"kind": kind}))
+        else:
+            fields.append(pa.field(name, array.type))
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def _read_arrow_records(
+    path: str, columns: Optional[List[str]] = None, memory_map: bool = True
+) -> Dict[str, Any]:
+    import pyarrow as pa
+
+    source = pa.memory_map(path, "r") if memory_map else pa.OSFile(path, "rb")
+    table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    loads = get_json_backend().loads
+    data = {}
+    for field, column in zip(table.schema, table.columns):
+        name = field.name
+        kind = (field.metadata or {}).get(b"kind")
+        if kind == b"json":
+            data[name] = [loads(value) for value in column.to_pylist()]
+        elif kind == b"bigint":
+            data[name] = [int(value) for value in column.to_pylist()]
+        elif (
+            pa.types.is_integer(column.type)
+            or pa.types.is_floating(column.type)
+            or pa.types.is_boolean(column.type)
+        ) and column.null_count == 0:
+            data[name] = column.to_numpy()
+        else:
+            data[name] = column.to_pylist()
+    return data
+
+
+def _write_numpy_records(columns: Dict[str, List[Any]], dir_path: str) -> None:
+    import numpy as np
+
+    create_directory(dir_path)
+    # Remove the meta file first, so that partially written directories are not readable
+    meta_path = os.path.join(dir_path, RECORDS_META_FILE_NAME)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    dumps = get_json_backend().dumps
+    column_metas = []
+    num_records = None
+    for idx, (name, values) in enumerate(columns.items()):
+        values = list(values)
+        if num_records is None:
+            num_records = len(values)
+        assert (
+            len(values) == num_records
+        ), f"All columns must have the same length, but {name} has {len(values)} values (expected {num_records})."
+        kind = _get_column_kind(values)
+        if kind == "numpy":
+            array = np.asarray(values)
+            # Integers that do not fit in 64 bits become an object array, which cannot be memory-mapped.
+            # They are stored as decimal strings (some json backends parse them as floats).
+            if array.dtype.kind not in _NUMPY_KINDS[type(values[0])]:
+                kind = "bigint" if type(values[0]) is int else "json"
+        if kind == "numpy":
+            np.save(os.path.join(dir_path, f"{idx}.npy"), array)
+        else:
+            if kind == "json":
+                values = [dumps(value) for value in values]
+            elif kind == "bigint":
+                values = [str(value) for value in values]
+            encoded_values = [value.encode("utf-8") for value in values]
+            offsets = np.zeros(len(encoded_values) + 1, dtype=np.int64)
+            np.cumsum([len(value) for value in encoded_values], out=offsets[1:])
+            data = np.frombuffer(b"".join(encoded_values), dtype=np.uint8)
+            np.save(os.path.join(dir_path, f"{idx}.data.npy"), data)
+            np.save(os.path.join(dir_path, f"{idx}.offsets.npy"), offsets)
+        column_metas.append({"name": name, "kind": kind})
+    write_json_file(
+        {"num_records": num_records or 0, "columns": column_metas},
+        meta_path,
+        atomic=True,
+    )
+
+
+def _read_numpy_records(
+    dir_path: str, columns: Optional[List[str]] = None, memory_map: bool = True
+) -> Dict[str, Any]:
+    import numpy as np
+
+    meta = read_json_file(os.path.join(dir_path, RECORDS_META_FILE_NAME))
+    column_metas = {
+        column_meta["name"]: (idx, column_meta["kind"])
+        for idx, column_meta in enumerate(meta["columns"])
+    }
+    mmap_mode = "r" if memory_map else None
+    loads = get_json_backend().loads
+    data = {}
+    for name in columns if columns is not None else column_metas:
+        idx, kind = column_metas[name]
+        if kind == "numpy":
+            data[name] = np.load(
+                os.path.join(dir_path, f"{idx}.npy"), mmap_mode=mmap_mode
+            )
+            continue
+        raw_data = np.load(
+            os.path.join(dir_path, f"{idx}.data.npy"), mmap_mode=mmap_mode
+        ).tobytes()
+        offsets = np.load(os.path.join(dir_path, f"{idx}.offsets.npy")).tolist()
+        values = [
+            raw_data[start:end].decode("utf-8")
+            for start, end in zip(offsets[:-1], offsets[1:])
+        ]
+        if kind == "json":
+            values = [loads(value) for value in values]
+        elif kind == "bigint":
+            values = [int(value) for value in values]
+        data[name] = values
+    return data
+
+
 # Related to config files
+CONFIG_CACHE_SIZE = 128
+
+
+def _get_config_file_key(file_path: str) -> Tuple[str, int, int]:
+    """Key of a config file for caching (the cached config is invalidated when the file is modified)"""
+    file_path = os.path.abspath(file_path)
+    stat = os.stat(file_path)
+    return file_path, stat.st_mtime_ns, stat.st_size
+
 
+@functools.lru_cache(maxsize=CONFIG_CACHE_SIZE)
+def _load_config_file(file_key: Tuple[str, int, int]) -> omegaconf.DictConfig:
+    return omegaconf.OmegaConf.load(file_key[0])
 
-def read_config_file(file_path: str) -> omegaconf.OmegaConf:
+
+@functools.lru_cache(maxsize=CONFIG_CACHE_SIZE)
+def _merge_config_files(
+    file_keys: Tuple[Tuple[str, int, int], ...],
+) -> omegaconf.DictConfig:
+    return omegaconf.OmegaConf.merge(*[_load_config_file(key) for key in file_keys])
+
+
+def clear_config_cache() -> None:
+    """Clear the cache of read_config_file and read_config_files"""
+    _load_config_file.cache_clear()
+    _merge_config_files.cache_clear()
+
+
+def read_config_file(file_path: str, use_cache: bool = True) -> omegaconf.OmegaConf:
     """Load a config file
 
     :param file_path: config file path
     :type file_path: str
+    :param use_cache: reuse the parsed config if the file has not been modified since the last read.
+        A copy of the cached config is returned, so modifying it does not affect the cache, defaults to True
+    :type use_cache: bool, optional
     :return: config data
     :rtype: omegaconf.OmegaConf
     """
-    return omegaconf.OmegaConf.load(file_path)
+    if not use_cache:
+        return omegaconf.OmegaConf.load(file_path)
+    return copy.deepcopy(_load_config_file(_get_config_file_key(file_path)))
+
+
+def read_config_files(
+    file_paths: List[str], use_cache: bool = True
+) -> omegaconf.OmegaConf:
+    """Load config files and merge them in order (i.e., later files override earlier ones)
+
+    :param file_paths: config file paths (e.g., [base config, override config, ...])
+    :type file_paths: List[str]
+    :param use_cache: reuse the merged config if none of the files has been modified since the last read, defaults to True
+    :type use_cache: bool, optional
+    :return: merged config data
+    :rtype: omegaconf.OmegaConf
+    """
+    if not use_cache:
+        return omegaconf.OmegaConf.merge(
+            *[omegaconf.OmegaConf.load(file_path) for file_path in file_paths]
+        )
+    file_keys = tuple(_get_config_file_key(file_path) for file_path in file_paths)
+    return copy.deepcopy(_merge_config_files(file_keys))
 
 
 def load_config_file(file_path: str) -> omegaconf.OmegaConf:
@@ -216,6 +1606,161 @@ def write_config_file(config: omegaconf.OmegaConf, file_path: str) -> None:
 
 
 # Related to csv file
+def _resolve_csv_columns(
+    header: Optional[List[str]],
+    num_columns: int,
+    usecols: Optional[List[Union[str, int]]] = None,
+) -> Tuple[List[int], List[Union[str, int]]]:
+    """Get indices and names (header names, or indices if header is not available) of the selected columns"""
+    if usecols is None:
+        indices = list(range(num_columns))
+    else:
+        indices = []
+        for col in usecols:
+            if isinstance(col, str):
+                assert header is not None, f"Column name ({col}) requires a header row."
+                indices.append(header.index(col))
+            else:
+                indices.append(col)
+    names = [header[idx] for idx in indices] if header is not None else indices
+    return indices, names
+
+
+def _project_csv_row(row: List[str], indices: List[int]) -> List[Optional[str]]:
+    """Select the values of the columns (None for the columns missing in rows shorter than the header)"""
+    try:
+        return [row[idx] for idx in indices]
+    except IndexError:
+        return [row[idx] if idx < len(row) else None for idx in indices]
+
+
+def _iter_csv_rows(
+    file_path: str,
+    delimiter: str = ",",
+    quotechar: str = '"',
+    show_progress: bool = False,
+    first_row_as_header: bool = True,
+    process_row_func: Optional[Callable] = None,
+    usecols: Optional[List[Union[str, int]]] = None,
+    converters: Optional[Dict[Union[str, int], Callable]] = None,
+    encoding: Optional[str] = None,
+    skip: int = 0,
+    step: int = 1,
+) -> Iterator[Union[List[Union[str, int]], List[Any]]]:
+    """Yield names of the selected columns first, and then the (projected and converted) values of each row"""
+    with _open_file(file_path, "r", encoding=encoding, newline="") as f:
+        csv_reader = csv.reader(f, delimiter=delimiter, quotechar=quotechar)
+        header = next(csv_reader, None) if first_row_as_header else None
+        file_iterator = tqdm.tqdm(csv_reader) if show_progress else csv_reader
+        if skip or step != 1:
+            # Select the rows before processing them, so that the skipped rows are not converted
+            file_iterator = itertools.islice(file_iterator, skip, None, step)
+        if process_row_func:
+            file_iterator = map(process_row_func, file_iterator)
+        # Peek the first row to figure out the number of columns
+        first_row = next(file_iterator, None)
+        num_columns = len(header) if header is not None else len(first_row or [])
+        indices, names = _resolve_csv_columns(header, num_columns, usecols)
+        yield names
+        if first_row is None:
+            return None
+        rows = itertools.chain([first_row], file_iterator)
+        if usecols is not None:
+            rows = map(functools.partial(_project_csv_row, indices=indices), rows)
+        if converters:
+            funcs = [
+                converters.get(name, converters.get(idx))
+                for idx, name in zip(indices, names)
+            ]
+            rows = (
+                [
+                    value if func is None or value is None else func(value)
+                    for func, value in zip(funcs, row)
+                ]
+                for row in rows
+            )
+        yield from rows
+
+
+def iter_csv_file(
+    file_path: str,
+    delimiter: str = ",",
+    quotechar: str = '"',
+    show_progress: bool = False,
+    first_row_as_header: bool = True,
+    process_row_func: Optional[Callable] = None,
+    usecols: Optional[List[Union[str, int]]] = None,
+    converters: Optional[Dict[Union[str, int], Callable]] = None,
+    encoding: Optional[str] = None,
+    skip: int = 0,
+    step: int = 1,
+) -> Iterator[Union[Dict[str, Any], List[Any]]]:
+    """Lazily read csv like files (e.g., tsv, csv, etc.), one row at a time
+
+    :param usecols: names (or indices) of the columns to read (None for the columns missing in short rows), defaults to None (all columns)
+    :type usecols: Optional[List[Union[str, int]]], optional
+    :param converters: functions to convert the values of each column, keyed by column name (or index)
+    :type converters: Optional[Dict[Union[str, int], Callable]], optional
+    :param skip: number of rows (excluding the header) to skip from the beginning, defaults to 0
+    :type skip: int, optional
+    :param step: yield every step-th row after skip, defaults to 1
+    :type step: int, optional
+    :yield: a dict if header is available, otherwise a list
+    :rtype: Iterator[Union[Dict[str, Any], List[Any]]]
+    """
+    rows = _iter_csv_rows(
+        file_path,
+        delimiter=delimiter,
+        quotechar=quotechar,
+        show_progress=show_progress,
+        first_row_as_header=first_row_as_header,
+        process_row_func=process_row_func,
+        usecols=usecols,
+        converters=converters,
+        encoding=encoding,
+        skip=skip,
+        step=step,
+    )
+    names = next(rows)
+    for row in rows:
+        yield dict(zip(names, row)) if first_row_as_header else row
+
+
+def iter_csv_byte_range(
+    file_path: str,
+    start: int,
+    end: int,
+    delimiter: str = ",",
+    quotechar: str = '"',
+    first_row_as_header: bool = True,
+    encoding: Optional[str] = None,
+) -> Iterator[Union[Dict[str, Any], List[Any]]]:
+    """Lazily read the rows of a csv like file within a byte range (memory usage stays constant).
+    The header is read from the first line of the file. Quoted values spanning multiple lines are not supported.
+
+    :param file_path: uncompressed csv file path
+    :type file_path: str
+    :param start: start byte offset aligned to the start of a line (see get_line_aligned_byte_ranges)
+    :type start: int
+    :param end: end byte offset (exclusive)
+    :type end: int
+    :yield: a dict if header is available, otherwise a list
+    :rtype: Iterator[Union[Dict[str, Any], List[Any]]]
+    """
+    encoding = encoding or "utf-8"
+    header = None
+    if first_row_as_header:
+        with open(file_path, "r", encoding=encoding, newline="") as f:
+            header = next(csv.reader(f, delimiter=delimiter, quotechar=quotechar), None)
+    lines = (
+        line.decode(encoding)
+        for offset, line in _iter_lines_in_byte_range(file_path, start, end)
+        if not (first_row_as_header and offset == 0)
+    )
+    for row in csv.reader(lines, delimiter=delimiter, quotechar=quotechar):
+        yield dict(zip(header, row)) if first_row_as_header else row
+
+
 def read_csv_file(
     file_path: str,
     delimiter: str = ",",
@@ -223,102 +1768,790 @@ def read_csv_file(
     show_progress: bool = False,
     first_row_as_header: bool = True,
     process_row_func: Callable = None,
-) -> List[Union[Dict[str, Any], List[Any]]]:
-    """Read csv like files (e.g., tsv, csv, etc.)"""
-    dict_list = []
-    with open(file_path, "r") as f:
-        tsv_file_reader = csv.reader(f, delimiter=delimiter, quotechar=quotechar)
-        if first_row_as_header:
-            # Get headers
-            header = next(tsv_file_reader)
-        # Get values
-        file_iterator = tqdm.tqdm(tsv_file_reader) if show_progress else tsv_file_reader
-        for row in file_iterator:
-            row = process_row_func(row) if process_row_func else row
-            if first_row_as_header:
-                # Save a dict if header is available
-                dict_list.append(dict(zip(header, row)))
-            else:
-                # Save a list if header is not available
-                dict_list.append(row)
-    return dict_list
+    usecols: Optional[List[Union[str, int]]] = None,
+    converters: Optional[Dict[Union[str, int], Callable]] = None,
+    as_columns: bool = False,
+    as_numpy: bool = False,
+    encoding: Optional[str] = None,
+) -> Union[List[Union[Dict[str, Any], List[Any]]], Dict[Union[str, int], Any]]:
+    """Read csv like files (e.g., tsv, csv, etc.)
+
+    :param as_columns: return a dict of columns (column name (or index) -> list of values)
+        instead of a list of rows. This avoids allocating an object per row, defaults to False
+    :type as_columns: bool, optional
+    :param as_numpy: convert each column into a numpy array (only used with as_columns), defaults to False
+    :type as_numpy: bool, optional
+    """
+    kwargs = dict(
+        delimiter=delimiter,
+        quotechar=quotechar,
+        show_progress=show_progress,
+        first_row_as_header=first_row_as_header,
+        process_row_func=process_row_func,
+        usecols=usecols,
+        converters=converters,
+        encoding=encoding,
+    )
+    if not as_columns:
+        return list(iter_csv_file(file_path, **kwargs))
+    # Read in columnar format
+    rows = _iter_csv_rows(file_path, **kwargs)
+    names = next(rows)
+    columns = {name: [] for name in names}
+    appenders = [columns[name].append for name in names]
+    for row in rows:
+        for append, value in zip(appenders, row):
+            append(value)
+    if as_numpy:
+        import numpy as np
+
+        columns = {name: np.asarray(values) for name, values in columns.items()}
+    return columns
 
 
 def write_csv_file(
-    list_of_item: List[Union[Dict[str, Any], List[Any]]],
+    list_of_item: Union[
+        Iterable[Union[Dict[str, Any], List[Any]]], Dict[str, List[Any]]
+    ],
     file_path: str,
     delimiter: str = ",",
+    batch_size: int = 10000,
+    buffer_size: int = 1024 * 1024,
+    compression: Optional[str] = "infer",
+    compression_level: Optional[int] = None,
+    encoding: Optional[str] = None,
+    atomic: bool = False,
+    durable: bool = True,
 ) -> None:
-    """Write csv like data (e.g., tsv, csv, etc.) into a file"""
-    assert len(list_of_item) > 0, "list_of_item is empty"
-    with open(file_path, "w") as f:
-        tsv_file_writer = csv.writer(f, delimiter=delimiter)
-        if isinstance(list_of_item[0], dict):
-            # Add header
-            tsv_file_writer.writerow(list_of_item[0].keys())
-            # Add values
-            for dict_item in list_of_item:
-                tsv_file_writer.writerow(dict_item.values())
-        elif isinstance(list_of_item[0], list):
-            # Add values
-            for list_item in list_of_item:
-                tsv_file_writer.writerow(list_item)
+    """Write csv like data (e.g., tsv, csv, etc.) into a file
+
+    :param list_of_item: iterable of rows (dicts or lists), or a dict of columns (column name -> list of values).
+        Rows are consumed lazily, so generators can be written without holding all rows in memory.
+    :type list_of_item: Union[Iterable[Union[Dict[str, Any], List[Any]]], Dict[str, List[Any]]]
+    :param batch_size: number of rows to write at once, defaults to 10000
+    :type batch_size: int, optional
+    :param buffer_size: buffer size of the file handle in bytes, defaults to 1MB
+    :type buffer_size: int, optional
+    :param compression: compress the output with "gzip", "bz2", "xz" or "zstd",
+        defaults to "infer" (inferred from the file extension)
+    :type compression: Optional[str], optional
+    :param atomic: write to a temporary file and rename it to file_path when done, defaults to False
+    :type atomic: bool, optional
+    :param durable: fsync the file before renaming (only used with atomic), defaults to True
+    :type durable: bool, optional
+    """
+    header = None
+    if isinstance(list_of_item, dict):
+        # Dict of columns
+        header = list(list_of_item.keys())
+        rows = zip(*list_of_item.values())
+    else:
+        rows = iter(list_of_item)
+        first_item = next(rows, None)
+        if isinstance(first_item, dict):
+            header = list(first_item.keys())
+            rows = (
+                dict_item.values() for dict_item in itertools.chain([first_item], rows)
+            )
+        elif isinstance(first_item, (list, tuple)):
+            rows = itertools.chain([first_item], rows)
+        elif first_item is not None:
+            raise RuntimeError(f"Invalid type of list_of_item: {type(first_item)}")
+    if compression == "infer":
+        compression = infer_compression(file_path)
+    with atomic_write_path(file_path, atomic, durable) as path, _open_file(
+        path,
+        "w",
+        encoding=encoding,
+        newline="",
+        buffering=buffer_size,
+        compression=compression,
+        compression_level=compression_level,
+    ) as f:
+        csv_writer = csv.writer(f, delimiter=delimiter)
+        if header is not None:
+            csv_writer.writerow(header)
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            csv_writer.writerows(batch)
+
+
+# Related to sharded datasets
+SHARDED_MANIFEST_FILE_NAME = "manifest.json"
+SHARDED_FORMATS = {"jsonl": "jsonl", "csv": "csv", "pickle": "pkl"}
+
+
+class _CsvLine:
+    """File-like object that keeps the last line written by csv.writer"""
+
+    def __init__(self):
+        self.line = ""
+
+    def write(self, line: str) -> None:
+        self.line = line
+
+
+class ShardedWriter:
+    """Write records into multiple shard files (jsonl, csv or pickle) and a manifest.
+    A new shard is started when the current one reaches max_records_per_shard records or max_bytes_per_shard bytes
+    (uncompressed). The manifest lists the file name, number of records and size of each shard,
+    so that ShardedReader can read the shards assigned to each worker.
+
+    Jsonl and csv shards are written incrementally. Pickle shards hold a list of the records of the shard,
+    so the records of the current shard are kept in memory until the shard is written.
+
+    The manifest is written only when the writer is closed successfully. If the with block raises,
+    the writer is aborted without the manifest, so that an incomplete output is not read as a complete dataset.
+    The manifest and the shards (with the same prefix) of a previous run in dir_path are removed when the writer is created.
+
+    Example:
+        with ShardedWriter("output_dir", format="jsonl", max_records_per_shard=100000) as writer:
+            for record in generate_records():
+                writer.write(record)
+    """
+
+    def __init__(
+        self,
+        dir_path: str,
+        format: str = "jsonl",
+        max_records_per_shard: Optional[int] = None,
+        max_bytes_per_shard: Optional[int] = None,
+        prefix: str = "shard",
+        compression: Optional[str] = None,
+        encoding: str = "utf-8",
+    ):
+        assert (
+            format in SHARDED_FORMATS
+        ), f"format must be one of {list(SHARDED_FORMATS)}, but {format} is given."
+        assert (
+            max_records_per_shard is not None or max_bytes_per_shard is not None
+        ), "Please set max_records_per_shard or max_bytes_per_shard."
+        self.dir_path = dir_path
+        self.format = format
+        self.max_records_per_shard = max_records_per_shard
+        self.max_bytes_per_shard = max_bytes_per_shard
+        self.prefix = prefix
+        self.compression = compression
+        self.encoding = encoding
+        self.shards: List[Dict[str, Any]] = []
+        self.csv_header: Optional[List[str]] = None
+        self._file = None
+        self._pickle_records: List[Any] = []
+        self._num_records = 0
+        self._num_bytes = 0
+        self._dumps = get_json_backend().dumps
+        self._csv_line = _CsvLine()
+        self._csv_writer = csv.writer(self._csv_line)
+        create_directory(dir_path)
+        self._remove_previous_output()
+
+    def __enter__(self) -> "ShardedWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    @property
+    def num_records(self) -> int:
+        return sum(shard["num_records"] for shard in self.shards) + self._num_records
+
+    def write(self, record: Any) -> None:
+        if self._is_shard_full():
+            self._close_shard()
+        if self.format == "pickle":
+            self._pickle_records.append(record)
+            if self.max_bytes_per_shard is not None:
+                self._num_bytes += len(pickle.dumps(record))
+        else:
+            self._write_line(record)
+        self._num_records += 1
+
+    def write_all(self, records: Iterable[Any]) -> None:
+        for record in records:
+            self.write(record)
+
+    def close(self) -> None:
+        """Write the last shard and the manifest"""
+        if self._num_records > 0:
+            self._close_shard()
+        write_json_file(
+            {
+                "format": self.format,
+                "csv_header": self.csv_header,
+                "num_records": self.num_records,
+                "shards": self.shards,
+            },
+            os.path.join(self.dir_path, SHARDED_MANIFEST_FILE_NAME),
+            atomic=True,
+        )
+
+    def abort(self) -> None:
+        """Close the current shard file without writing the manifest (the written shards are left as they are)"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._pickle_records = []
+        self._num_records = 0
+        self._num_bytes = 0
+
+    def _remove_previous_output(self) -> None:
+        # Remove the manifest first, so that the directory is not readable until the new manifest is written
+        manifest_path = os.path.join(self.dir_path, SHARDED_MANIFEST_FILE_NAME)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        # Remove the shards of a previous run (which may have used another format or compression)
+        shard_pattern = re.compile(
+            rf"{re.escape(self.prefix)}-\d+\.({'|'.join(SHARDED_FORMATS.values())})"
+            rf"({'|'.join(map(re.escape, COMPRESSION_EXTENSIONS))})?"
+        )
+        for file_name in os.listdir(self.dir_path):
+            if shard_pattern.fullmatch(file_name):
+                os.remove(os.path.join(self.dir_path, file_name))
+
+    def _is_shard_full(self) -> bool:
+        if self._num_records == 0:
+            return False
+        if (
+            self.max_records_per_shard is not None
+            and self._num_records >= self.max_records_per_shard
+        ):
+            return True
+        return (
+            self.max_bytes_per_shard is not None
+            and self._num_bytes >= self.max_bytes_per_shard
+        )
+
+    def _get_shard_path(self) -> str:
+        file_name = (
+            f"{self.prefix}-{len(self.shards):05d}.{SHARDED_FORMATS[self.format]}"
+        )
+        if self.compression is not None:
+            extensions = {v: k for k, v in COMPRESSION_EXTENSIONS.items()}
+            file_name += extensions[self.compression]
+        return os.path.join(self.dir_path, file_name)
+
+    def _write_line(self, record: Any) -> None:
+        if self.format == "jsonl":
+            line = f"{self._dumps(record)}\n"
+        else:
+            if isinstance(record, dict):
+                if self.csv_header is None:
+                    self.csv_header = list(record.keys())
+                record = record.values()
+            self._csv_writer.writerow(record)
+            line = self._csv_line.line
+        encoded_line = line.encode(self.encoding)
+        if self._file is None:
+            self._file = _open_file(self._get_shard_path(), "wb")
+            if self.csv_header is not None:
+                self._csv_writer.writerow(self.csv_header)
+                self._file.write(self._csv_line.line.encode(self.encoding))
+        self._file.write(encoded_line)
+        self._num_bytes += len(encoded_line)
+
+    def _close_shard(self) -> None:
+        shard_path = self._get_shard_path()
+        if self.format == "pickle":
+            write_pickle_file(self._pickle_records, shard_path)
+            self._pickle_records = []
+        else:
+            self._file.close()
+            self._file = None
+        self.shards.append(
+            {
+                "file_name": os.path.basename(shard_path),
+                "num_records": self._num_records,
+                "num_bytes": os.path.getsize(shard_path),
+            }
+        )
+        self._num_records = 0
+        self._num_bytes = 0
+
+
+class ShardedReader:
+    """Read shards written by ShardedWriter.
+    Each worker can read only the shards assigned to it (shard i is assigned to worker i % total_proc_n),
+    without reading the other shards.
+
+    Example:
+        reader = ShardedReader("output_dir")
+        for record in reader.iter_records(total_proc_n=8, current_proc_n=worker_id):
+            process(record)
+    """
+
+    def __init__(self, dir_path: str, encoding: str = "utf-8"):
+        self.dir_path = dir_path
+        self.encoding = encoding
+        self.manifest = read_json_file(
+            os.path.join(dir_path, SHARDED_MANIFEST_FILE_NAME)
+        )
+
+    def __len__(self) -> int:
+        return self.manifest["num_records"]
+
+    @property
+    def num_shards(self) -> int:
+        return len(self.manifest["shards"])
+
+    def get_shard_indices(
+        self, total_proc_n: int = 1, current_proc_n: int = 0
+    ) -> List[int]:
+        """Get indices of the shards assigned to the current process"""
+        assert (
+            0 <= current_proc_n < total_proc_n
+        ), f"current_proc_n must be in [0, {total_proc_n}), but {current_proc_n} is given."
+        return list(range(current_proc_n, self.num_shards, total_proc_n))
+
+    def iter_shard(self, shard_idx: int) -> Iterator[Any]:
+        """Lazily read the records of a shard (pickle shards are loaded at once)"""
+        shard_path = os.path.join(
+            self.dir_path, self.manifest["shards"][shard_idx]["file_name"]
+        )
+        format = self.manifest["format"]
+        if format == "jsonl":
+            yield from iter_jsonl_file(shard_path, encoding=self.encoding)
+        elif format == "csv":
+            yield from iter_csv_file(
+                shard_path,
+                first_row_as_header=self.manifest["csv_header"] is not None,
+                encoding=self.encoding,
+            )
         else:
-            raise RuntimeError(f"Invalid type of list_of_item: {type(list_of_item[0])}")
+            yield from read_pickle_file(shard_path)
+
+    def read_shard(self, shard_idx: int) -> List[Any]:
+        return list(self.iter_shard(shard_idx))
+
+    def iter_records(
+        self, total_proc_n: int = 1, current_proc_n: int = 0
+    ) -> Iterator[Any]:
+        """Lazily read the records of the shards assigned to the current process"""
+        for shard_idx in self.get_shard_indices(total_proc_n, current_proc_n):
+            yield from self.iter_shard(shard_idx)
+
+
+# Related to async file I/O
+ASYNC_IO_MAX_WORKERS = 16
+_async_io_executor: Optional[ThreadPoolExecutor] = None
+_async_io_executor_lock = threading.Lock()
+
+
+def _get_async_io_executor() -> ThreadPoolExecutor:
+    global _async_io_executor
+    with _async_io_executor_lock:
+        if _async_io_executor is None:
+            _async_io_executor = ThreadPoolExecutor(
+                max_workers=ASYNC_IO_MAX_WORKERS, thread_name_prefix="async_io"
+            )
+        return _async_io_executor
+
+
+def set_async_io_max_workers(max_workers: int) -> None:
+    """Set the number of threads used by the async file functions (i.e., maximum number of concurrent file operations)"""
+    global ASYNC_IO_MAX_WORKERS, _async_io_executor
+    with _async_io_executor_lock:
+        ASYNC_IO_MAX_WORKERS = max_workers
+        if _async_io_executor is not None:
+            _async_io_executor.shutdown(wait=False)
+            _async_io_executor = None
+
+
+async def run_in_io_executor(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking (file I/O) function in the bounded thread pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_async_io_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+async def aread_json_file(file_path: str, **kwargs) -> Dict:
+    """Async version of read_json_file"""
+    return await run_in_io_executor(read_json_file, file_path, **kwargs)
 
 
-def get_directory_size(directory: str, recursive: bool = True) -> int:
+async def awrite_json_file(dict_object: Dict, file_path: str, **kwargs) -> None:
+    """Async version of write_json_file"""
+    return await run_in_io_executor(write_json_file, dict_object, file_path, **kwargs)
+
+
+async def aread_jsonl_file(file_path: str, **kwargs) -> List[Any]:
+    """Async version of read_jsonl_file"""
+    return await run_in_io_executor(read_jsonl_file, file_path, **kwargs)
+
+
+async def aiter_jsonl_file(
+    file_path: str, chunk_size: int = 1000, **kwargs
+) -> AsyncIterator[Any]:
+    """Async version of iter_jsonl_file. Records are read in chunks of chunk_size in the thread pool
+
+    Example:
+        async for record in aiter_jsonl_file("data.jsonl"):
+            await process(record)
+    """
+    records = iter_jsonl_file(file_path, **kwargs)
+    try:
+        while True:
+            chunk = await run_in_io_executor(
+                lambda: list(itertools.islice(records, chunk_size))
+            )
+            if not chunk:
+                break
+            for record in chunk:
+                yield record
+    finally:
+        await run_in_io_executor(records.close)
+
+
+async def awrite_jsonl_file(
+    list_of_dict_object: Union[Iterable[Dict], AsyncIterable[Dict]],
+    file_path: str,
+    chunk_size: int = 1000,
+    **kwargs,
+) -> None:
+    """Async version of write_jsonl_file. Records of an async iterable are written in chunks of chunk_size"""
+    if not hasattr(list_of_dict_object, "__aiter__"):
+        return await run_in_io_executor(
+            write_jsonl_file, list_of_dict_object, file_path, **kwargs
+        )
+    writer = JsonlWriter(file_path, **kwargs)
+    await run_in_io_executor(writer.open)
+    try:
+        chunk = []
+        async for record in list_of_dict_object:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                await run_in_io_executor(writer.write_all, chunk)
+                chunk = []
+        await run_in_io_executor(writer.write_all, chunk)
+    except BaseException:
+        await run_in_io_executor(writer.abort if writer.atomic else writer.close)
+        raise
+    await run_in_io_executor(writer.close)
+
+
+async def aread_yaml_file(file_path: str) -> Dict:
+    """Async version of read_yaml_file"""
+    return await run_in_io_executor(read_yaml_file, file_path)
+
+
+async def aread_pickle_file(file_path: str, **kwargs) -> Any:
+    """Async version of read_pickle_file"""
+    return await run_in_io_executor(read_pickle_file, file_path, **kwargs)
+
+
+async def awrite_pickle_file(object_to_save: Any, file_path: str, **kwargs) -> None:
+    """Async version of write_pickle_file"""
+    return await run_in_io_executor(
+        write_pickle_file, object_to_save, file_path, **kwargs
+    )
+
+
+async def aread_csv_file(file_path: str, **kwargs) -> Any:
+    """Async version of read_csv_file"""
+    return await run_in_io_executor(read_csv_file, file_path, **kwargs)
+
+
+@dataclasses.dataclass
+class DirectoryUsage:
+    """Sizes of a directory (including its sub directories within the scanned depth)"""
+
+    path: str
+    logical_size: int = 0  # Sum of the file sizes
+    disk_usage: int = (
+        0  # Actual disk space used (i.e., allocated blocks), similar to `du`
+    )
+    num_files: int = 0
+    num_directories: int = 0
+    sub_directories: Dict[str, "DirectoryUsage"] = dataclasses.field(
+        default_factory=dict
+    )
+    inaccessible_paths: List[str] = dataclasses.field(default_factory=list)
+
+    def add(self, logical_size: int, disk_usage: int, num_files: int) -> None:
+        self.logical_size += logical_size
+        self.disk_usage += disk_usage
+        self.num_files += num_files
+
+
+def _scan_directory_files(
+    dir_path: str,
+    seen_inodes: Optional[set] = None,
+    lock: Optional[threading.Lock] = None,
+) -> Tuple[int, int, int, List[str]]:
+    """Get sizes of the files (not following symlinks) directly in a directory and names of its subdirectories.
+    Files with multiple hard links are counted once if seen_inodes is given.
+
+    :return: logical size, disk usage, number of files, and names of subdirectories
+    :rtype: Tuple[int, int, int, List[str]]
+    """
+    logical_size, disk_usage, num_files, sub_dir_names = 0, 0, 0, []
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                sub_dir_names.append(entry.name)
+            elif entry.is_file(follow_symlinks=False):
+                stat = entry.stat(follow_symlinks=False)
+                if seen_inodes is not None and stat.st_nlink > 1:
+                    with lock:
+                        if (stat.st_dev, stat.st_ino) in seen_inodes:
+                            continue
+                        seen_inodes.add((stat.st_dev, stat.st_ino))
+                logical_size += stat.st_size
+                # Convert blocks (512-byte) to actual usage
+                disk_usage += getattr(stat, "st_blocks", 0) * 512
+                num_files += 1
+    return logical_size, disk_usage, num_files, sub_dir_names
+
+
+def scan_directory_usage(
+    directory: str,
+    recursive: bool = True,
+    max_depth: Optional[int] = None,
+    num_workers: int = 1,
+    breakdown: bool = False,
+    count_hardlinks_once: bool = True,
+) -> DirectoryUsage:
+    """
+    Calculate both the logical size and the disk usage of a directory in a single (iterative) pass.
+
+    Symbolic links are not followed (similar to `du`), and files with multiple hard links are counted once.
+    Subdirectories that cannot be read are skipped and listed in `inaccessible_paths`,
+    but an OSError is raised if the directory itself cannot be read (e.g., it does not exist).
+
+    Args:
+        directory (str): Path to the directory.
+        recursive (bool): Whether to include subdirectories in the size calculation.
+        max_depth (Optional[int]): Maximum depth of subdirectories to scan (0 means only the files in the directory).
+        num_workers (int): Number of threads to scan directories concurrently.
+        breakdown (bool): Whether to report the sizes of each immediate subdirectory in `sub_directories`.
+        count_hardlinks_once (bool): Whether to count files with multiple hard links only once.
+
+    Returns:
+        DirectoryUsage: Sizes of the directory.
+    """
+    if not recursive:
+        max_depth = 0
+    usage = DirectoryUsage(path=directory)
+    seen_inodes = set()
+    lock = threading.Lock()
+
+    def scan(dir_path: str) -> Tuple[int, int, int, List[str]]:
+        try:
+            logical_size, disk_usage, num_files, sub_dir_names = _scan_directory_files(
+                dir_path, seen_inodes if count_hardlinks_once else None, lock
+            )
+        except OSError:
+            if dir_path == directory:
+                raise
+            with lock:
+                usage.inaccessible_paths.append(dir_path)
+            return 0, 0, 0, []
+        sub_dir_paths = [os.path.join(dir_path, name) for name in sub_dir_names]
+        return logical_size, disk_usage, num_files, sub_dir_paths
+
+    def update(
+        dir_path: str, depth: int, result: Tuple[int, int, int, List[str]]
+    ) -> List[Tuple[str, int]]:
+        """Aggregate the result and get the subdirectories to scan next"""
+        logical_size, disk_usage, num_files, sub_dir_paths = result
+        usage.add(logical_size, disk_usage, num_files)
+        if depth > 0:
+            usage.num_directories += 1
+            if breakdown:
+                top_dir_name = os.path.relpath(dir_path, directory).split(os.sep)[0]
+                if top_dir_name not in usage.sub_directories:
+                    usage.sub_directories[top_dir_name] = DirectoryUsage(
+                        path=os.path.join(directory, top_dir_name)
+                    )
+                sub_usage = usage.sub_directories[top_dir_name]
+                sub_usage.add(logical_size, disk_usage, num_files)
+                if depth > 1:
+                    sub_usage.num_directories += 1
+        if max_depth is not None and depth >= max_depth:
+            return []
+        return [(sub_dir_path, depth + 1) for sub_dir_path in sub_dir_paths]
+
+    if num_workers <= 1:
+        to_scan = [(directory, 0)]
+        while to_scan:
+            dir_path, depth = to_scan.pop()
+            to_scan.extend(update(dir_path, depth, scan(dir_path)))
+    else:
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            futures = {executor.submit(scan, directory): (directory, 0)}
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    dir_path, depth = futures.pop(future)
+                    for sub_dir_path, sub_depth in update(
+                        dir_path, depth, future.result()
+                    ):
+                        futures[executor.submit(scan, sub_dir_path)] = (
+                            sub_dir_path,
+                            sub_depth,
+                        )
+    return usage
+
+
+def get_directory_size(
+    directory: str,
+    recursive: bool = True,
+    max_depth: Optional[int] = None,
+    num_workers: int = 1,
+) -> int:
     """
     Calculate the total logical size of a directory, optionally including subdirectories.
 
     This function sums up the actual file sizes (logical size) without considering
     filesystem block alignment, sparse files, or compression.
+    Use scan_directory_usage to get both the logical size and the disk usage in a single pass.
 
     Args:
         directory (str): Path to the directory.
         recursive (bool): Whether to include subdirectories in the size calculation.
+        max_depth (Optional[int]): Maximum depth of subdirectories to include.
+        num_workers (int): Number of threads to scan directories concurrently.
 
     Returns:
         int: Total logical size of the directory in bytes.
     """
-    total_size: int = 0
-    try:
-        for entry in os.scandir(directory):
-            if entry.is_file():
-                total_size += entry.stat().st_size  # Logical file size
-            elif entry.is_dir() and recursive:
-                total_size += get_directory_size(entry.path, recursive=recursive)
-    except PermissionError:
-        print(f"Permission denied: {directory}")
-    return total_size
+    return scan_directory_usage(
+        directory, recursive=recursive, max_depth=max_depth, num_workers=num_workers
+    ).logical_size
 
 
-def get_disk_usage(directory: str, recursive: bool = True) -> int:
+def get_disk_usage(
+    directory: str,
+    recursive: bool = True,
+    max_depth: Optional[int] = None,
+    num_workers: int = 1,
+) -> int:
     """
     Calculate the actual disk space used by a directory, optionally including subdirectories.
 
     This function considers filesystem block size, sparse files, and metadata overhead,
     providing an estimate similar to `du -sh`.
+    Use scan_directory_usage to get both the logical size and the disk usage in a single pass.
 
     Args:
         directory (str): Path to the directory.
         recursive (bool): Whether to include subdirectories in the size calculation.
+        max_depth (Optional[int]): Maximum depth of subdirectories to include.
+        num_workers (int): Number of threads to scan directories concurrently.
 
     Returns:
         int: Total disk usage of the directory in bytes.
     """
-    total_size: int = 0
-    try:
-        for entry in os.scandir(directory):
-            if entry.is_file():
-                total_size += (
-                    entry.stat().st_blocks * 512
-                )  # Convert blocks (512-byte) to actual usage
-            elif entry.is_dir() and recursive:
-                total_size += get_disk_usage(entry.path, recursive=recursive)
-    except PermissionError:
-        print(f"Permission denied: {directory}")
-    return total_size
+    return scan_directory_usage(
+        directory, recursive=recursive, max_depth=max_depth, num_workers=num_workers
+    ).disk_usage
+
+
+class DirectorySizeTracker:
+    """Track the size of a directory with incremental rescans.
+
+    The sizes of the files directly in each directory are kept in a snapshot (optionally persisted to snapshot_path),
+    along with the modification time of the directory. On each update, only directories whose modification time
+    changed are listed again, so repeated polls of a large, mostly unchanged tree are cheap.
+
+    Note that the modification time of a directory changes only when entries are added, removed or renamed.
+    In-place modifications of existing files (e.g., appending to a log file) are not detected until
+    the directory changes or update(full=True) is called. Hard links are not deduplicated.
+
+    Example:
+        tracker = DirectorySizeTracker("/scratch/cache", snapshot_path="/scratch/.cache_size.json")
+        while True:
+            if tracker.update().disk_usage > limit:
+                evict_caches()
+            time.sleep(300)
+    """
+
+    def __init__(self, directory: str, snapshot_path: Optional[str] = None):
+        self.directory = directory
+        self.snapshot_path = snapshot_path
+        self.num_rescanned_directories = 0
+        self._snapshot: Dict[str, Dict[str, Any]] = self._load_snapshot()
+
+    @property
+    def logical_size(self) -> int:
+        return sum(item["logical_size"] for item in self._snapshot.values())
+
+    @property
+    def disk_usage(self) -> int:
+        return sum(item["disk_usage"] for item in self._snapshot.values())
+
+    def update(self, full: bool = False) -> DirectoryUsage:
+        """Rescan the directories whose modification time changed (or all directories if full)
+
+        :param full: rescan all directories, defaults to False
+        :type full: bool, optional
+        :return: sizes of the directory
+        :rtype: DirectoryUsage
+        :raises OSError: if the directory itself cannot be read
+        """
+        usage = DirectoryUsage(path=self.directory)
+        new_snapshot: Dict[str, Dict[str, Any]] = {}
+        self.num_rescanned_directories = 0
+        to_scan = [self.directory]
+        while to_scan:
+            dir_path = to_scan.pop()
+            try:
+                mtime_ns = os.stat(dir_path).st_mtime_ns
+                item = self._snapshot.get(dir_path)
+                if full or item is None or item["mtime_ns"] != mtime_ns:
+                    logical_size, disk_usage, num_files, sub_dir_names = (
+                        _scan_directory_files(dir_path)
+                    )
+                    item = {
+                        "mtime_ns": mtime_ns,
+                        "logical_size": logical_size,
+                        "disk_usage": disk_usage,
+                        "num_files": num_files,
+                        "sub_dir_names": sub_dir_names,
+                    }
+                    self.num_rescanned_directories += 1
+            except OSError:
+                if dir_path == self.directory:
+                    raise
+                usage.inaccessible_paths.append(dir_path)
+                continue
+            new_snapshot[dir_path] = item
+            usage.add(item["logical_size"], item["disk_usage"], item["num_files"])
+            if dir_path != self.directory:
+                usage.num_directories += 1
+            to_scan.extend(
+                os.path.join(dir_path, name) for name in item["sub_dir_names"]
+            )
+        self._snapshot = new_snapshot
+        self._save_snapshot()
+        return usage
+
+    def _load_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return {}
+        try:
+            snapshot = read_json_file(self.snapshot_path)
+        except ValueError:
+            return {}
+        if snapshot.get("directory") != self.directory:
+            return {}
+        return snapshot["directories"]
+
+    def _save_snapshot(self) -> None:
+        if not self.snapshot_path:
+            return None
+        write_json_file(
+            {"directory": self.directory, "directories": self._snapshot},
+            self.snapshot_path,
+            indent=0,
+            atomic=True,
+            durable=False,
+        )
 
 
 def bytes_to_readable(size_bytes: int) -> str:
@@ -49,6 +49,32 @@ def divide_into_chunks(
     return divided_chunks
 
 
+def divide_into_even_chunks(
+    lst: Union[List[Any], Dict], num_chunks: int
+) -> Union[List[Any], Dict]:
+    """Divide a list (or dict) into exactly num_chunks contiguous chunks whose sizes differ by at most one.
+    Unlike divide_into_chunks, trailing chunks are never missing (they are empty if there are fewer items than chunks).
+
+    :param lst: list or dict to divide
+    :type lst: Union[List[Any], Dict]
+    :param num_chunks: number of chunks
+    :type num_chunks: int
+    :return: list of chunks
+    :rtype: Union[List[Any], Dict]
+    """
+    items = list(lst.items()) if isinstance(lst, dict) else lst
+    quotient, remainder = divmod(len(items), num_chunks)
+    divided_chunks = []
+    start = 0
+    for chunk_idx in range(num_chunks):
+        end = start + quotient + (1 if chunk_idx < remainder else 0)
+        divided_chunks.append(items[start:end])
+        start = end
+    if isinstance(lst, dict):
+        return [dict(chunk) for chunk in divided_chunks]
+    return divided_chunks
+
+
 def chunks(
     iterator: Union[Iterable[Any], List[Any]],
     chunk_size: int,
@@ -208,6 +208,20 @@ class Timer(metaclass=TimerMeta):
         self.start_time = None
         return self.elapsed_time
 
+    def add_elapsed_time(
+        self, elapsed_time: float, end_time: Optional[float] = None
+    ) -> None:
+        """Record a time measured elsewhere (e.g., in a worker process) as a call of this timer
+
+        :param elapsed_time: measured time in seconds
+        :type elapsed_time: float
+        :param end_time: time when the measurement ended, defaults to None (current time)
+        :type end_time: Optional[float], optional
+        """
+        end_time = time_module.time() if end_time is None else end_time
+        self.call_cnt += 1
+        self.measured_times.append(Period(end_time - elapsed_time, end_time))
+
     # Methods for printing the measured time
     def show_elapsed_time(self) -> None:
         self.logger.info(f"Elapsed time: {prettify_time(self.elapsed_time)}")
@@ -1,21 +1,82 @@
+import asyncio
+import os
+import time
+import types
 import unittest
 
 import src.hkkang_utils.concurrent as concurrent_utils
 
 
-def count_million_and_print_name(id: int, name: str="noname") -> str:
+def count_million_and_print_name(id: int, name: str = "noname") -> str:
     for _ in range(1000000):
         pass
     print(f"id: {id}, name: {name}")
     return name
 
+
+_worker_state = {}
+
+
+def init_worker_state(value: int) -> None:
+    _worker_state["value"] = value
+
+
+def get_worker_state_and_pid(offset: int) -> tuple:
+    return _worker_state.get("value", 0) + offset, os.getpid()
+
+
+def square(x: int) -> int:
+    return x * x
+
+
+def sum_shared_rows(handle, start: int, end: int) -> float:
+    return float(handle.array[start:end].sum())
+
+
+def fail_until_marker_exists(marker_path: str, value: int) -> int:
+    # Fail on the first call, and succeed afterwards
+    if not os.path.exists(marker_path):
+        open(marker_path, "w").close()
+        raise RuntimeError("Transient failure")
+    return value
+
+
+def fail_if_negative(value: int) -> int:
+    if value < 0:
+        raise ValueError(f"Negative value: {value}")
+    return value
+
+
+def exit_worker_once(marker_path: str, value: int) -> int:
+    # Kill the worker process on the first call to break the pool
+    if not os.path.exists(marker_path):
+        open(marker_path, "w").close()
+        os._exit(1)
+    return value
+
+
+def exit_worker_if_negative(value: int) -> int:
+    # Always kill the worker process for negative values
+    if value < 0:
+        os._exit(1)
+    return value
+
+
+async def async_square(x: int, delay: float = 0.0) -> int:
+    await asyncio.sleep(delay)
+    return x * x
+
+
 class Test_concurrent(unittest.TestCase):
     def __init__(self, *args, **kwargs):
         super(Test_concurrent, self).__init__(*args, **kwargs)
-    
+
     def test_threading(self):
         # Create threads
-        threads = [concurrent_utils.Thread(count_million_and_print_name, 1, name=f"name_{i}") for i in range(10)]
+        threads = [
+            concurrent_utils.Thread(count_million_and_print_name, 1, name=f"name_{i}")
+            for i in range(10)
+        ]
 
         # Start threads
         for thread in threads:
@@ -26,27 +87,368 @@ class Test_concurrent(unittest.TestCase):
 
         # Get results
         results = [thread.result for thread in threads]
-        
+
         # Validate results
         for i, result in enumerate(results):
-            self.assertEqual(result, f"name_{i}")        
+            self.assertEqual(result, f"name_{i}")
 
     def test_multi_processing(self):
         multiprocessor = concurrent_utils.MultiProcessor(4)
-        
+
         # Start processes
         for i in range(10):
             multiprocessor.run(count_million_and_print_name, 1, name=f"name_{i}")
-        
+
         multiprocessor.join()
-        
+
         # Get results
         results = multiprocessor.results
 
-        
         # Validate results
         for i, result in enumerate(results):
-            self.assertEqual(result, f"name_{i}")       
+            self.assertEqual(result, f"name_{i}")
+
+    def test_multi_processing_run_after_join(self):
+        multiprocessor = concurrent_utils.MultiProcessor(2)
+        for batch_idx in range(2):
+            for i in range(3):
+                multiprocessor.run(
+                    count_million_and_print_name, 1, name=f"name_{batch_idx}_{i}"
+                )
+            multiprocessor.join()
+            # Results of the previous batch should not be accumulated
+            self.assertEqual(
+                multiprocessor.results, [f"name_{batch_idx}_{i}" for i in range(3)]
+            )
+
+    def test_multi_processing_persistent_pool(self):
+        with concurrent_utils.MultiProcessor(
+            2,
+            persistent=True,
+            initializer=init_worker_state,
+            initargs=(100,),
+            mp_context="spawn",
+        ) as multiprocessor:
+            pids = set()
+            for batch_idx in range(3):
+                for i in range(4):
+                    multiprocessor.run(get_worker_state_and_pid, i)
+                multiprocessor.join()
+                values = [value for value, _ in multiprocessor.results]
+                self.assertEqual(values, [100 + i for i in range(4)])
+                pids.update(pid for _, pid in multiprocessor.results)
+            # Worker processes are reused across batches
+            self.assertLessEqual(len(pids), 2)
+
+    def test_multi_processing_map(self):
+        with concurrent_utils.MultiProcessor(2) as multiprocessor:
+            # Fixed chunksize
+            results = list(multiprocessor.map(square, range(100), chunksize=7))
+            self.assertEqual(results, [x * x for x in range(100)])
+            # Auto-tuned chunksize with a generator input
+            results = list(multiprocessor.map(square, (x for x in range(1000))))
+            self.assertEqual(results, [x * x for x in range(1000)])
+            self.assertGreater(multiprocessor.last_chunksize, 1)
+            # Unordered results
+            results = multiprocessor.imap_unordered(square, range(100), chunksize=3)
+            self.assertEqual(sorted(results), [x * x for x in range(100)])
+            # The workers are shut down after the iteration (unless persistent)
+            self.assertIsNone(multiprocessor._executor)
+        with concurrent_utils.MultiProcessor(2, persistent=True) as multiprocessor:
+            self.assertEqual(
+                list(multiprocessor.map(square, range(10))), [x * x for x in range(10)]
+            )
+            self.assertIsNotNone(multiprocessor._executor)
+
+    def test_multi_processing_shared_array(self):
+        import numpy as np
+
+        array = np.arange(10000, dtype=np.float64).reshape(100, 100)
+        with concurrent_utils.MultiProcessor(2) as multiprocessor:
+            handle = multiprocessor.share(array)
+            for start in range(0, 100, 25):
+                multiprocessor.run(sum_shared_rows, handle, start, start + 25)
+            multiprocessor.join()
+            self.assertEqual(
+                multiprocessor.results,
+                [float(array[start : start + 25].sum()) for start in range(0, 100, 25)],
+            )
+
+    def test_thread_pool(self):
+        with concurrent_utils.ThreadPool(4) as pool:
+            for i in range(10):
+                pool.run(lambda x: x * 2, i)
+            pool.join()
+            self.assertEqual(pool.results, [i * 2 for i in range(10)])
+            results = list(pool.map(square, range(50), chunksize=4))
+            self.assertEqual(results, [x * x for x in range(50)])
+
+    def test_thread_pool_timeout(self):
+        pool = concurrent_utils.ThreadPool(1, task_timeout=0.1)
+        pool.run(time.sleep, 1)
+        with self.assertRaises(TimeoutError):
+            pool.join()
+        pool.close()
+
+    def test_task_timeout_in_with_block(self):
+        for pool_class in [
+            concurrent_utils.MultiProcessor,
+            concurrent_utils.ThreadPool,
+        ]:
+            start_time = time.time()
+            with self.assertRaises(TimeoutError):
+                with pool_class(2, task_timeout=0.5) as pool:
+                    # One hung task among tasks that keep finishing
+                    pool.run(time.sleep, 3)
+                    for _ in range(20):
+                        pool.run(time.sleep, 0.1)
+            # Neither waits for the other tasks to finish nor for the hung task
+            self.assertLess(time.time() - start_time, 2)
+
+    def test_async_pool(self):
+        pool = concurrent_utils.AsyncPool(2)
+        for i in range(10):
+            pool.run(async_square, i, delay=0.01)
+        pool.join()
+        self.assertEqual(pool.results, [i * i for i in range(10)])
+
+        # Awaitable join with a timeout
+        async def run_with_timeout():
+            async with concurrent_utils.AsyncPool(2, task_timeout=0.05) as pool:
+                pool.run(async_square, 1, delay=1)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(run_with_timeout())
+
+    def test_multi_processing_retry(self):
+        marker_path = "test_concurrent_retry.marker"
+        try:
+            multiprocessor = concurrent_utils.MultiProcessor(
+                2, max_retries=1, retry_backoff=0.01
+            )
+            multiprocessor.run(fail_until_marker_exists, marker_path, 3)
+            multiprocessor.join()
+            self.assertEqual(multiprocessor.results, [3])
+        finally:
+            if os.path.exists(marker_path):
+                os.remove(marker_path)
+
+    def test_multi_processing_return_exceptions(self):
+        with concurrent_utils.MultiProcessor(
+            2, return_exceptions=True
+        ) as multiprocessor:
+            for value in [1, -1, 2]:
+                multiprocessor.run(fail_if_negative, value)
+        results = multiprocessor.results
+        self.assertEqual(results[0], 1)
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(results[2], 2)
+        # Raise the exception by default
+        with self.assertRaises(ValueError):
+            with concurrent_utils.MultiProcessor(2) as multiprocessor:
+                multiprocessor.run(fail_if_negative, -1)
+
+    def test_multi_processing_respawn_broken_pool(self):
+        marker_path = "test_concurrent_respawn.marker"
+        try:
+            with concurrent_utils.MultiProcessor(
+                2, max_retries=1, retry_backoff=0.01
+            ) as multiprocessor:
+                multiprocessor.run(exit_worker_once, marker_path, 1)
+                for value in range(2, 5):
+                    multiprocessor.run(fail_if_negative, value)
+            self.assertEqual(multiprocessor.results, [1, 2, 3, 4])
+        finally:
+            if os.path.exists(marker_path):
+                os.remove(marker_path)
+
+    def test_multi_processing_broken_pool_with_crashing_task(self):
+        for max_retries in [0, 1]:
+            with concurrent_utils.MultiProcessor(
+                2, max_retries=max_retries, retry_backoff=0.01, return_exceptions=True
+            ) as multiprocessor:
+                for value in [-1, 1, 2, 3, 4, 5]:
+                    multiprocessor.run(exit_worker_if_negative, value)
+            results = multiprocessor.results
+            # Only the crashing task fails
+            self.assertIsInstance(results[0], concurrent_utils.BrokenExecutor)
+            self.assertEqual(results[1:], [1, 2, 3, 4, 5])
+
+    def test_multi_processing_checkpoint(self):
+        checkpoint_path = "test_concurrent.ckpt"
+        try:
+            # First run: the failed task is not checkpointed
+            with concurrent_utils.MultiProcessor(
+                2, return_exceptions=True, checkpoint_path=checkpoint_path
+            ) as multiprocessor:
+                for value in [1, -2, 3]:
+                    multiprocessor.run(fail_if_negative, value)
+            self.assertIsInstance(multiprocessor.results[1], ValueError)
+            # Resumed run: finished tasks are skipped and their results are restored
+            with concurrent_utils.MultiProcessor(
+                2, checkpoint_path=checkpoint_path
+            ) as multiprocessor:
+                multiprocessor.run(fail_if_negative, -1)
+                multiprocessor.run(fail_if_negative, 2)
+                multiprocessor.run(fail_if_negative, -3)
+            self.assertEqual(multiprocessor.results, [1, 2, 3])
+        finally:
+            if os.path.exists(checkpoint_path):
+                os.remove(checkpoint_path)
+
+    def test_multi_processing_stats(self):
+        multiprocessor = concurrent_utils.MultiProcessor(
+            2, collect_stats=True, persistent=True
+        )
+        for value in range(10):
+            multiprocessor.run(square, value)
+        multiprocessor.join()
+        self.assertEqual(multiprocessor.results, [x * x for x in range(10)])
+        results = list(multiprocessor.map(square, range(100), chunksize=10))
+        self.assertEqual(results, [x * x for x in range(100)])
+        multiprocessor.close()
+
+        stats = multiprocessor.stats
+        self.assertEqual(stats.num_completed, 20)
+        self.assertEqual(stats.num_items, 110)
+        self.assertEqual(stats.queue_depth, 0)
+        self.assertGreaterEqual(stats.max_queue_depth, 1)
+        self.assertGreater(stats.tasks_per_sec, 0)
+        self.assertGreater(stats.total_serialization_time, 0)
+        self.assertLessEqual(len(stats.worker_busy_times), 2)
+        latencies = stats.get_latency_percentiles([50, 99])
+        self.assertLessEqual(latencies[50], latencies[99])
+        summary = stats.summary()
+        self.assertEqual(summary["num_completed"], 20)
+        # Times are also recorded in the timers
+        timer = concurrent_utils.Timer(class_name="MultiProcessor", func_name="execute")
+        self.assertGreaterEqual(timer.call_cnt, 20)
+
+    def test_thread_pool_stats(self):
+        pool = concurrent_utils.ThreadPool(2, collect_stats=True)
+        for value in [1, -1, 2]:
+            pool.run(fail_if_negative, value)
+        with self.assertRaises(ValueError):
+            pool.join()
+        pool.close()
+        self.assertEqual(pool.stats.num_failed, 1)
+        self.assertEqual(pool.stats.total_serialization_time, 0)
+
+    def test_partial_processor_contiguous(self):
+        data = list(range(9))
+        partial_processor = concurrent_utils.PartialProcessor(total_proc_n=6)
+        # Exactly total_proc_n partitions, even if the data is not divided evenly
+        chunks = [
+            partial_processor.get_partial_data(data, current_proc_n=proc_n)
+            for proc_n in range(6)
+        ]
+        self.assertEqual(chunks, [[0, 1], [2, 3], [4, 5], [6], [7], [8]])
+        self.assertEqual(partial_processor.merge(chunks), data)
+
+    def test_partial_processor_weighted(self):
+        data = ["a" * 100, "b" * 10, "c" * 60, "d" * 50, "e" * 40, "f" * 5]
+        partial_processor = concurrent_utils.PartialProcessor(
+            total_proc_n=2, partition_mode="weighted", cost_func=len
+        )
+        chunks = partial_processor.divide_into_chunks(data)
+        self.assertEqual(len(chunks), 2)
+        costs = [sum(len(item) for item in chunk) for chunk in chunks]
+        # Greedy LPT: (100, 40) and (60, 50, 10, 5), while the contiguous split gives (170, 95)
+        self.assertEqual(sorted(costs), [125, 140])
+        # Items keep their original order within the partition
+        self.assertEqual(chunks[0], [item for item in data if item in chunks[0]])
+        results = [[item[0] for item in chunk] for chunk in chunks]
+        self.assertEqual(
+            partial_processor.merge(results, data=data), ["a", "b", "c", "d", "e", "f"]
+        )
+
+    def test_partial_processor_round_robin_and_hash(self):
+        data = list(range(10))
+        partial_processor = concurrent_utils.PartialProcessor(
+            total_proc_n=3, partition_mode="round_robin"
+        )
+        chunks = partial_processor.divide_into_chunks(data)
+        self.assertEqual(chunks, [[0, 3, 6, 9], [1, 4, 7], [2, 5, 8]])
+        self.assertEqual(partial_processor.merge(chunks), data)
+
+        data = {f"key_{i}": i for i in range(20)}
+        partial_processor = concurrent_utils.PartialProcessor(
+            total_proc_n=3, partition_mode="hash"
+        )
+        chunks = partial_processor.divide_into_chunks(data)
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 20)
+        # The partition of each item does not depend on the other items
+        partial_data = dict(list(data.items())[5:])
+        for key in partial_data:
+            proc_n = [i for i, chunk in enumerate(chunks) if key in chunk][0]
+            self.assertIn(
+                key,
+                partial_processor.get_partial_data(partial_data, current_proc_n=proc_n),
+            )
+        # Other items (e.g., objects with the default repr) need key_func
+        items = [types.SimpleNamespace(name=f"item_{i}") for i in range(5)]
+        with self.assertRaises(AssertionError):
+            partial_processor.divide_into_chunks(items)
+        partial_processor.key_func = lambda item: item.name
+        chunks = partial_processor.divide_into_chunks(items)
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 5)
+
+    def test_streaming_partial_processor(self):
+        import src.hkkang_utils.file as file_utils
+
+        records = [{"id": i} for i in range(20)]
+        jsonl_path = "test_streaming_partial.jsonl"
+        csv_path = "test_streaming_partial.csv"
+        file_utils.write_jsonl_file(records, jsonl_path)
+        file_utils.write_csv_file([{"id": str(i)} for i in range(20)], csv_path)
+        try:
+            for partition_mode in ["round_robin", "byte_range", "hash"]:
+                for source in [jsonl_path, csv_path, range(20)]:
+                    if partition_mode == "byte_range" and not isinstance(source, str):
+                        continue
+                    chunks = [
+                        list(
+                            concurrent_utils.StreamingPartialProcessor(
+                                total_proc_n=3,
+                                current_proc_n=proc_n,
+                                partition_mode=partition_mode,
+                            ).iter_partial_data(source)
+                        )
+                        for proc_n in range(3)
+                    ]
+                    ids = [
+                        int(item["id"]) if isinstance(item, dict) else item
+                        for chunk in chunks
+                        for item in chunk
+                    ]
+                    # Each item belongs to exactly one partition
+                    self.assertEqual(sorted(ids), list(range(20)))
+
+            # Call with a function consuming the partition lazily
+            partial_processor = concurrent_utils.StreamingPartialProcessor(
+                func=lambda items: [item["id"] for item in items],
+                total_proc_n=4,
+                current_proc_n=1,
+            )
+            self.assertEqual(partial_processor(jsonl_path), [1, 5, 9, 13, 17])
+
+            # Methods for in-memory data do not silently fall back to another mode
+            partial_processor = concurrent_utils.StreamingPartialProcessor(
+                total_proc_n=2, current_proc_n=0, partition_mode="byte_range"
+            )
+            with self.assertRaises(ValueError):
+                partial_processor.get_partial_data(list(range(10)))
+            self.assertEqual(partial_processor.merge([[0, 1], [2]]), [0, 1, 2])
+            partial_processor = concurrent_utils.StreamingPartialProcessor(
+                total_proc_n=2, current_proc_n=1
+            )
+            self.assertEqual(
+                partial_processor.get_partial_data(list(range(6))), [1, 3, 5]
+            )
+        finally:
+            os.remove(jsonl_path)
+            os.remove(csv_path)
 
 
 if __name__ == "__main__":
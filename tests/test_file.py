@@ -1,7 +1,11 @@
+import asyncio
 import os
+import gzip
 import json
+import math
 import string
 import random
+import shutil
 import unittest
 
 import src.hkkang_utils.file as file_utils
@@ -77,8 +81,662 @@ class Test_file_utils(unittest.TestCase):
             json_data = file_utils.read_json_file(file_path)
             self.assertEqual(json_data, env.dummpy_dict_data)
 
+    def test_json_backends(self):
+        import dataclasses
+
+        import numpy as np
+
+        @dataclasses.dataclass
+        class Item:
+            id: int
+            name: str
+
+        jsonl_path = "test.jsonl"
+        records = [
+            {"id": i, "text": f"텍스트_{i}", "nested": {"a": [1, 2]}} for i in range(10)
+        ]
+        for backend_name in ["orjson", "ujson", "json"]:
+            try:
+                backend = file_utils.get_json_backend(backend_name)
+            except ImportError:
+                continue
+            self.assertEqual(backend.loads(backend.dumps(records)), records)
+            # NumPy arrays and dataclasses are serializable
+            self.assertEqual(
+                backend.loads(
+                    backend.dumps({"array": np.arange(3), "item": Item(1, "a")})
+                ),
+                {"array": [0, 1, 2], "item": {"id": 1, "name": "a"}},
+            )
+            self.assertTrue(backend.dumps("텍스트", ensure_ascii=True).isascii())
+            # Indentation other than 2 spaces (orjson falls back to another backend)
+            dumped = backend.dumps({"a": [1]}, indent=4)
+            self.assertIn('\n    "a"', dumped)
+            self.assertEqual(backend.loads(dumped), {"a": [1]})
+            # NaN and integers exceeding 64 bits round-trip unchanged
+            loaded = backend.loads(backend.dumps({"a": float("nan"), "b": 2**70}))
+            self.assertTrue(math.isnan(loaded["a"]))
+            self.assertEqual(loaded["b"], 2**70)
+            self.assertIsInstance(loaded["b"], int)
+            self.assertTrue(math.isnan(backend.loads(b"[NaN]")[0]))
+            self.assertEqual(backend.loads(b"[-18446744073709551617]"), [-(2**64) - 1])
+
+            # File functions use the selected backend
+            file_utils.set_json_backend(backend_name)
+            try:
+                file_utils.write_jsonl_file(records, jsonl_path)
+                self.assertEqual(file_utils.read_jsonl_file(jsonl_path), records)
+                file_utils.write_json_file(records, jsonl_path)
+                self.assertEqual(file_utils.read_json_file(jsonl_path), records)
+                # Files written with NaN (e.g., by the stdlib json) are readable
+                with open(jsonl_path, "w") as f:
+                    f.write('{"a": NaN, "b": 1}\n')
+                self.assertTrue(
+                    math.isnan(file_utils.read_jsonl_file(jsonl_path)[0]["a"])
+                )
+                self.assertTrue(math.isnan(file_utils.read_json_file(jsonl_path)["a"]))
+            finally:
+                file_utils.set_json_backend(None)
+
+        with self.assertRaises(ValueError):
+            file_utils.get_json_backend("unknown")
+
+        # Delete jsonl file
+        os.remove(jsonl_path)
+
+    def test_jsonl_file_functions(self):
+        jsonl_path = "test.jsonl"
+        records = [{"id": i, "text": f"text_{i}"} for i in range(10)]
+        # Write jsonl file from a generator
+        file_utils.write_jsonl_file((record for record in records), jsonl_path)
+
+        # Read in jsonl file
+        self.assertEqual(file_utils.read_jsonl_file(jsonl_path), records)
+        self.assertEqual(
+            list(file_utils.iter_jsonl_file(jsonl_path, skip=3, limit=4)),
+            records[3:7],
+        )
+        self.assertEqual(
+            list(file_utils.iter_jsonl_file(jsonl_path, skip=1, step=3)),
+            records[1::3],
+        )
+
+        # Read in byte ranges
+        byte_ranges = file_utils.get_line_aligned_byte_ranges(jsonl_path, 3)
+        self.assertEqual(
+            [
+                record
+                for start, end in byte_ranges
+                for record in file_utils.iter_jsonl_byte_range(jsonl_path, start, end)
+            ],
+            records,
+        )
+
+        # Delete jsonl file
+        os.remove(jsonl_path)
+
+    def test_jsonl_writer(self):
+        jsonl_path = "test.jsonl"
+        records = [{"id": i} for i in range(5)]
+        with file_utils.JsonlWriter(jsonl_path, buffer_size=2) as writer:
+            writer.write_all(records[:3])
+            writer.flush()
+            self.assertEqual(file_utils.read_jsonl_file(jsonl_path), records[:3])
+            writer.write_all(records[3:])
+        self.assertEqual(writer.num_written, len(records))
+        self.assertEqual(file_utils.read_jsonl_file(jsonl_path), records)
+
+        # Delete jsonl file
+        os.remove(jsonl_path)
+
+    def test_read_jsonl_file_with_multiple_workers(self):
+        jsonl_path = "test.jsonl"
+        records = [{"id": i, "text": "a" * (i % 7)} for i in range(1000)]
+        file_utils.write_jsonl_file(records, jsonl_path)
+
+        # Records must be returned in the original order
+        self.assertEqual(file_utils.read_jsonl_file(jsonl_path, num_workers=4), records)
+        self.assertEqual(
+            file_utils.read_jsonl_file(jsonl_path, num_workers=4, skip=10, limit=5),
+            records[10:15],
+        )
+
+        # Stop reading once skip + limit records are collected (the invalid lines at the end are not parsed)
+        with open(jsonl_path, "a") as f:
+            f.write("invalid json\n" * 10)
+        self.assertEqual(
+            file_utils.read_jsonl_file(jsonl_path, num_workers=2, limit=5),
+            records[:5],
+        )
+
+        # Delete jsonl file
+        os.remove(jsonl_path)
+
+    def test_jsonl_index(self):
+        jsonl_path = "test.jsonl"
+        records = [{"id": i, "text": "a" * (i % 7)} for i in range(100)]
+        file_utils.write_jsonl_file(records, jsonl_path)
+
+        with file_utils.JsonlIndex(jsonl_path) as index:
+            self.assertEqual(len(index), len(records))
+            self.assertEqual(index[42], records[42])
+            self.assertEqual(index[-1], records[-1])
+            self.assertEqual(index[10:20:3], records[10:20:3])
+            self.assertEqual(list(index), records)
+        self.assertTrue(os.path.exists(f"{jsonl_path}.idx"))
+
+        # Index should be rebuilt when the file changes
+        file_utils.write_jsonl_file(records[:5], jsonl_path)
+        with file_utils.JsonlIndex(jsonl_path) as index:
+            self.assertEqual(index[:], records[:5])
+
+        # Delete jsonl and index files
+        os.remove(jsonl_path)
+        os.remove(f"{jsonl_path}.idx")
+
+    def test_csv_file_functions_with_projection(self):
+        header = ["A", "B", "C"]
+        data = [["1", "x", "3.5"], ["4", "y", "6.5"]]
+        csv_path = "test.tsv"
+        file_utils.write_csv_file(
+            [dict(zip(header, row)) for row in data], csv_path, delimiter="\t"
+        )
+
+        # Read in selected columns with type conversion
+        rows = list(
+            file_utils.iter_csv_file(
+                csv_path, delimiter="\t", usecols=["C", "A"], converters={"A": int}
+            )
+        )
+        self.assertEqual(rows, [{"C": "3.5", "A": 1}, {"C": "6.5", "A": 4}])
+
+        # Read in columnar format
+        columns = file_utils.read_csv_file(
+            csv_path,
+            delimiter="\t",
+            usecols=["A", "C"],
+            converters={"A": int, "C": float},
+            as_columns=True,
+        )
+        self.assertEqual(columns, {"A": [1, 4], "C": [3.5, 6.5]})
+        columns = file_utils.read_csv_file(
+            csv_path, delimiter="\t", usecols=[0], as_columns=True, as_numpy=True
+        )
+        self.assertEqual(columns["A"].tolist(), ["1", "4"])
+
+        # Missing values of rows shorter than the header are None (and not converted)
+        with open(csv_path, "w") as f:
+            f.write("A\tB\tC\n1\tx\t3.5\n4\ty\n")
+        columns = file_utils.read_csv_file(
+            csv_path,
+            delimiter="\t",
+            usecols=["A", "C"],
+            converters={"A": int, "C": float},
+            as_columns=True,
+        )
+        self.assertEqual(columns, {"A": [1, 4], "C": [3.5, None]})
+
+        # Delete csv file
+        os.remove(csv_path)
+
+    def test_csv_file_partial_reads(self):
+        csv_path = "test_partial.csv"
+        rows = [{"id": str(i), "text": f"text_{i}"} for i in range(10)]
+        file_utils.write_csv_file(rows, csv_path)
+
+        # Strided rows
+        self.assertEqual(
+            list(file_utils.iter_csv_file(csv_path, skip=2, step=4)), rows[2::4]
+        )
+        # Skipped rows are not converted
+        self.assertEqual(
+            list(
+                file_utils.iter_csv_file(
+                    csv_path,
+                    skip=1,
+                    step=5,
+                    converters={"id": lambda value: 10 // (int(value) % 5)},
+                )
+            ),
+            [{"id": 10, "text": "text_1"}, {"id": 10, "text": "text_6"}],
+        )
+        # Rows in byte ranges (the header is read from the first line)
+        byte_ranges = file_utils.get_line_aligned_byte_ranges(csv_path, 3)
+        self.assertEqual(
+            [
+                row
+                for start, end in byte_ranges
+                for row in file_utils.iter_csv_byte_range(csv_path, start, end)
+            ],
+            rows,
+        )
+
+        # Delete csv file
+        os.remove(csv_path)
+
+    def test_write_csv_file_with_iterable_and_columns(self):
+        header = ["A", "B"]
+        data = [[str(i), str(i * 2)] for i in range(25)]
+        csv_object_original = [dict(zip(header, row)) for row in data]
+        csv_path = "test.csv"
+
+        # Write rows from a generator in multiple batches
+        file_utils.write_csv_file(
+            (item for item in csv_object_original), csv_path, batch_size=10
+        )
+        self.assertEqual(file_utils.read_csv_file(csv_path), csv_object_original)
+
+        # Write a dict of columns
+        columns = {name: [row[idx] for row in data] for idx, name in enumerate(header)}
+        file_utils.write_csv_file(columns, csv_path)
+        self.assertEqual(file_utils.read_csv_file(csv_path), csv_object_original)
+
+        # Write a compressed file
+        file_utils.write_csv_file(columns, f"{csv_path}.gz", compression="gzip")
+        with open(csv_path, "rb") as f, gzip.open(f"{csv_path}.gz", "rb") as gz_f:
+            self.assertEqual(f.read(), gz_f.read())
+
+        # Delete csv files
+        os.remove(csv_path)
+        os.remove(f"{csv_path}.gz")
+
+    def test_compressed_file_functions(self):
+        records = [{"id": i, "text": f"text_{i}"} for i in range(10)]
+        for extension in [".gz", ".bz2", ".xz"]:
+            # Json
+            file_path = f"test.json{extension}"
+            file_utils.write_json_file(records, file_path)
+            self.assertEqual(file_utils.read_json_file(file_path), records)
+            # Jsonl
+            file_path = f"test.jsonl{extension}"
+            file_utils.write_jsonl_file(records, file_path, compression_level=1)
+            self.assertEqual(file_utils.read_jsonl_file(file_path), records)
+            self.assertEqual(
+                file_utils.read_json_file(file_path, auto_detect_extension=True),
+                records,
+            )
+            # Csv
+            file_path = f"test.csv{extension}"
+            csv_object_original = [{"A": str(i), "B": str(i * 2)} for i in range(10)]
+            file_utils.write_csv_file(csv_object_original, file_path)
+            self.assertEqual(file_utils.read_csv_file(file_path), csv_object_original)
+            # Pickle
+            file_path = f"test.pkl{extension}"
+            file_utils.write_pickle_file(records, file_path)
+            self.assertEqual(file_utils.read_pickle_file(file_path), records)
+            # Yaml
+            file_path = f"test.yaml{extension}"
+            file_utils.write_yaml_file({"A": records}, file_path)
+            self.assertEqual(file_utils.read_yaml_file(file_path), {"A": records})
+
+            # Check if the files are compressed and delete them
+            for name in ["json", "jsonl", "csv", "pkl", "yaml"]:
+                file_path = f"test.{name}{extension}"
+                with open(file_path, "rb") as f:
+                    self.assertNotIn(b"text_1", f.read())
+                os.remove(file_path)
+
+    def test_atomic_write(self):
+        file_path = "test.json"
+        file_utils.write_json_file({"A": 1}, file_path, atomic=True)
+        self.assertEqual(file_utils.read_json_file(file_path), {"A": 1})
+
+        # Failed write should keep the previous content and leave no temporary file
+        def generate_records():
+            yield {"A": 2}
+            raise RuntimeError("Preempted")
+
+        with self.assertRaises(RuntimeError):
+            file_utils.write_jsonl_file(generate_records(), file_path, atomic=True)
+        self.assertEqual(file_utils.read_json_file(file_path), {"A": 1})
+        self.assertEqual(
+            [f for f in os.listdir(".") if f.endswith(file_path)], [file_path]
+        )
+
+        # Other writers
+        file_utils.write_pickle_file([1, 2], file_path, atomic=True, durable=False)
+        self.assertEqual(file_utils.read_pickle_file(file_path), [1, 2])
+        file_utils.write_yaml_file({"B": 2}, file_path, atomic=True)
+        self.assertEqual(file_utils.read_yaml_file(file_path), {"B": 2})
+        file_utils.write_csv_file([{"C": "3"}], file_path, atomic=True)
+        self.assertEqual(file_utils.read_csv_file(file_path), [{"C": "3"}])
+
+        # Delete file
+        os.remove(file_path)
+
+    def test_pickle_file_with_out_of_band_buffers(self):
+        import numpy as np
+
+        file_path = "test.pkl"
+        object_to_save = {
+            "large": np.arange(1024 * 1024, dtype=np.float32),
+            "small": np.arange(10),
+            "name": "test",
+        }
+        file_utils.write_pickle_file(object_to_save, file_path, out_of_band=True)
+        buffers_path = file_utils.get_pickle_buffers_path(file_path)
+        self.assertTrue(os.path.exists(buffers_path))
+
+        for mmap_buffers in [True, False]:
+            loaded_object = file_utils.read_pickle_file(
+                file_path, mmap_buffers=mmap_buffers
+            )
+            self.assertEqual(loaded_object["name"], object_to_save["name"])
+            for key in ["large", "small"]:
+                self.assertTrue(np.array_equal(loaded_object[key], object_to_save[key]))
+            # Loaded arrays are writable (copy-on-write)
+            loaded_object["large"][0] = -1
+
+        # Buffers of another write are rejected (e.g., after a crash between the renames)
+        with open(buffers_path, "rb") as f:
+            previous_buffers = f.read()
+        file_utils.write_pickle_file(
+            object_to_save, file_path, atomic=True, out_of_band=True
+        )
+        with open(buffers_path, "wb") as f:
+            f.write(previous_buffers)
+        with self.assertRaises(ValueError):
+            file_utils.read_pickle_file(file_path)
+
+        # Overwriting in-band removes the stale buffers
+        file_utils.write_pickle_file(object_to_save, file_path)
+        self.assertFalse(os.path.exists(buffers_path))
+        self.assertEqual(file_utils.read_pickle_file(file_path)["large"][0], 0)
+
+        # Delete file
+        os.remove(file_path)
+
+    def test_directory_size_functions(self):
+        dir_path = "test_dir_size"
+        file_utils.create_directory(os.path.join(dir_path, "a", "b"))
+        file_utils.create_directory(os.path.join(dir_path, "c"))
+        for path, size in [("x", 10), ("a/y", 100), ("a/b/z", 1000), ("c/w", 5)]:
+            with open(os.path.join(dir_path, path), "w") as f:
+                f.write("0" * size)
+        # Hard links should be counted once
+        os.link(os.path.join(dir_path, "a/b/z"), os.path.join(dir_path, "c/z_link"))
+
+        for num_workers in [1, 4]:
+            usage = file_utils.scan_directory_usage(
+                dir_path, num_workers=num_workers, breakdown=True
+            )
+            self.assertEqual(usage.logical_size, 1115)
+            self.assertEqual(usage.num_files, 4)
+            self.assertEqual(usage.num_directories, 3)
+            self.assertGreaterEqual(usage.disk_usage, 0)
+            self.assertEqual(
+                sum(sub.logical_size for sub in usage.sub_directories.values()), 1105
+            )
+            self.assertEqual(usage.sub_directories["a"].num_directories, 1)
+
+        self.assertEqual(file_utils.get_directory_size(dir_path), 1115)
+        self.assertEqual(file_utils.get_directory_size(dir_path, recursive=False), 10)
+        self.assertEqual(
+            file_utils.get_directory_size(os.path.join(dir_path, "a"), max_depth=0), 100
+        )
+        self.assertEqual(
+            file_utils.get_disk_usage(dir_path),
+            file_utils.scan_directory_usage(dir_path).disk_usage,
+        )
+
+        # Delete directory
+        shutil.rmtree(dir_path)
+
+        # A directory that cannot be read is not reported as empty
+        for num_workers in [1, 2]:
+            with self.assertRaises(FileNotFoundError):
+                file_utils.get_directory_size(dir_path, num_workers=num_workers)
+            with self.assertRaises(FileNotFoundError):
+                file_utils.get_disk_usage(dir_path, num_workers=num_workers)
+
+    def test_directory_size_tracker(self):
+        dir_path = "test_dir_size_tracker"
+        snapshot_path = "test_dir_size_snapshot.json"
+        file_utils.create_directory(os.path.join(dir_path, "a", "b"))
+        for path, size in [("x", 10), ("a/y", 100), ("a/b/z", 1000)]:
+            with open(os.path.join(dir_path, path), "w") as f:
+                f.write("0" * size)
+
+        tracker = file_utils.DirectorySizeTracker(dir_path, snapshot_path=snapshot_path)
+        self.assertEqual(tracker.update().logical_size, 1110)
+        self.assertEqual(tracker.num_rescanned_directories, 3)
+
+        # Unchanged directories are not rescanned (even with a new tracker)
+        tracker = file_utils.DirectorySizeTracker(dir_path, snapshot_path=snapshot_path)
+        self.assertEqual(tracker.update().logical_size, 1110)
+        self.assertEqual(tracker.num_rescanned_directories, 0)
+
+        # Only the modified directory is rescanned
+        with open(os.path.join(dir_path, "a/b/w"), "w") as f:
+            f.write("0" * 5)
+        os.utime(os.path.join(dir_path, "a/b"), ns=(0, 0))
+        usage = tracker.update()
+        self.assertEqual(usage.logical_size, 1115)
+        self.assertEqual(usage.num_files, 4)
+        self.assertEqual(tracker.num_rescanned_directories, 1)
+        self.assertEqual(tracker.logical_size, 1115)
+
+        # Delete directory and snapshot
+        shutil.rmtree(dir_path)
+        os.remove(snapshot_path)
+
+    def test_records_functions(self):
+        records = [
+            {
+                "id": i,
+                "score": i / 3,
+                "flag": i % 2 == 0,
+                "text": f"텍스트_{i}" if i else "",
+                "nested": {"a": [i]},
+                "optional": None if i % 3 else i,
+            }
+            for i in range(10)
+        ]
+        formats = ["numpy"]
+        try:
+            import pyarrow  # noqa: F401
+
+            formats.append("arrow")
+        except ImportError:
+            pass
+        for format in formats:
+            path = f"test_records.{format}"
+            file_utils.write_records(records, path, format=format)
+            for memory_map in [True, False]:
+                self.assertEqual(
+                    file_utils.read_records(path, memory_map=memory_map), records
+                )
+
+            # Read in selected columns
+            projected_records = file_utils.read_records(path, columns=["text", "id"])
+            self.assertEqual(
+                projected_records,
+                [{"text": record["text"], "id": record["id"]} for record in records],
+            )
+            columns = file_utils.read_records(path, columns=["id"], as_columns=True)
+            self.assertEqual(columns["id"].tolist(), list(range(10)))
+
+            # Delete records
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+        # Values that NumPy arrays or Arrow cannot keep are stored as strings or json
+        records = [
+            {"big": 2**70, "mixed": 1, "nested": {"a": [1]}},
+            {"big": 1, "mixed": 2.5, "nested": {"b": [2.5]}},
+        ]
+        for format in formats:
+            path = f"test_records.{format}"
+            file_utils.write_records(records, path, format=format)
+            loaded_records = file_utils.read_records(path)
+            self.assertEqual(loaded_records, records)
+            self.assertIs(type(loaded_records[0]["mixed"]), int)
+            self.assertIs(type(loaded_records[0]["nested"]["a"][0]), int)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+    def test_sharded_writer_and_reader(self):
+        dir_path = "test_sharded"
+        records = [{"id": str(i), "text": f"text_{i}"} for i in range(25)]
+        for format in ["jsonl", "csv", "pickle"]:
+            with file_utils.ShardedWriter(
+                dir_path, format=format, max_records_per_shard=10
+            ) as writer:
+                writer.write_all(records)
+            reader = file_utils.ShardedReader(dir_path)
+            self.assertEqual(len(reader), len(records))
+            self.assertEqual(reader.num_shards, 3)
+            self.assertEqual(
+                [shard["num_records"] for shard in reader.manifest["shards"]],
+                [10, 10, 5],
+            )
+            self.assertEqual(list(reader.iter_records()), records)
+            # Each process reads only its own shards
+            self.assertEqual(
+                list(reader.iter_records(total_proc_n=2, current_proc_n=1)),
+                records[10:20],
+            )
+            shutil.rmtree(dir_path)
+
+        # Roll over by byte size
+        with file_utils.ShardedWriter(
+            dir_path, format="jsonl", max_bytes_per_shard=100, compression="gzip"
+        ) as writer:
+            writer.write_all(records)
+        reader = file_utils.ShardedReader(dir_path)
+        self.assertGreater(reader.num_shards, 3)
+        self.assertTrue(reader.manifest["shards"][0]["file_name"].endswith(".jsonl.gz"))
+        self.assertEqual(list(reader.iter_records()), records)
+
+        # No manifest is written if writing fails (the output of the previous run is removed)
+        with open(os.path.join(dir_path, "other.txt"), "w") as f:
+            f.write("not a shard")
+        with self.assertRaises(RuntimeError):
+            with file_utils.ShardedWriter(
+                dir_path, format="jsonl", max_records_per_shard=10
+            ) as writer:
+                writer.write(records[0])
+                raise RuntimeError("Interrupted")
+        self.assertFalse(
+            os.path.exists(
+                os.path.join(dir_path, file_utils.SHARDED_MANIFEST_FILE_NAME)
+            )
+        )
+        self.assertEqual(
+            sorted(os.listdir(dir_path)), ["other.txt", "shard-00000.jsonl"]
+        )
+        shutil.rmtree(dir_path)
+
+    def test_async_file_functions(self):
+        jsonl_path = "test_async.jsonl"
+        records = [{"id": i} for i in range(25)]
+
+        async def generate_records():
+            for record in records:
+                yield record
+
+        async def run():
+            await file_utils.awrite_jsonl_file(
+                generate_records(), jsonl_path, chunk_size=10
+            )
+            read_records = [
+                record
+                async for record in file_utils.aiter_jsonl_file(
+                    jsonl_path, chunk_size=7
+                )
+            ]
+            self.assertEqual(read_records, records)
+            # Read files concurrently
+            with testing_environment() as env:
+                results = await asyncio.gather(
+                    *[file_utils.aread_json_file(path) for path in env.file_paths]
+                )
+                self.assertEqual(results, [env.dummpy_dict_data] * env.num_files)
+
+        asyncio.run(run())
+
+        # Delete jsonl file
+        os.remove(jsonl_path)
+
+    def test_config_file_functions(self):
+        base_path, override_path = "test_base.yaml", "test_override.yaml"
+        file_utils.write_yaml_file({"A": 1, "B": {"C": 2, "D": 3}}, base_path)
+        file_utils.write_yaml_file({"B": {"D": 4}}, override_path)
+
+        config = file_utils.read_config_file(base_path)
+        self.assertEqual(config.B.D, 3)
+        # Modifying the returned config should not affect the cache
+        config.B.D = 100
+        self.assertEqual(file_utils.read_config_file(base_path).B.D, 3)
+
+        # Merge configs in order
+        config = file_utils.read_config_files([base_path, override_path])
+        self.assertEqual(config.A, 1)
+        self.assertEqual(config.B.C, 2)
+        self.assertEqual(config.B.D, 4)
+
+        # Cache is invalidated when the file is modified
+        file_utils.write_yaml_file({"B": {"D": 5, "E": 6}}, override_path)
+        config = file_utils.read_config_files([base_path, override_path])
+        self.assertEqual(config.B.D, 5)
+
+        # Delete config files
+        os.remove(base_path)
+        os.remove(override_path)
+
     def test_get_files_in_all_sub_directories(self):
-        pass
+        with testing_environment() as env:
+            with testing_environment(
+                dir_name=os.path.join(env.dir_name, "sub_dir"), extension=".json"
+            ) as sub_env:
+                all_file_paths = set(env.file_paths + sub_env.file_paths)
+                for num_workers in [1, 4]:
+                    retrieved_file_paths = file_utils.get_files_in_all_sub_directories(
+                        env.dir_name, num_workers=num_workers
+                    )
+                    self.assertSetEqual(set(retrieved_file_paths), all_file_paths)
+                    self.assertEqual(len(retrieved_file_paths), len(all_file_paths))
+
+                # Filter file names
+                retrieved_file_paths = file_utils.get_files_in_all_sub_directories(
+                    env.dir_name, pattern="*.json"
+                )
+                self.assertSetEqual(set(retrieved_file_paths), set(sub_env.file_paths))
+                retrieved_file_paths = file_utils.get_files_in_all_sub_directories(
+                    env.dir_name, regex=r"\.txt$"
+                )
+                self.assertSetEqual(set(retrieved_file_paths), set(env.file_paths))
+
+    def test_get_files_in_all_sub_directories_with_cache(self):
+        cache_path = "test_listing_cache.json"
+        with testing_environment() as env:
+            retrieved_file_paths = file_utils.get_files_in_all_sub_directories(
+                env.dir_name, cache_path=cache_path
+            )
+            self.assertSetEqual(set(retrieved_file_paths), set(env.file_paths))
+            self.assertTrue(os.path.exists(cache_path))
+
+            # Cached listing is reused while the directory is not modified
+            retrieved_file_paths = file_utils.get_files_in_all_sub_directories(
+                env.dir_name, cache_path=cache_path
+            )
+            self.assertSetEqual(set(retrieved_file_paths), set(env.file_paths))
+
+            # Cached listing is invalidated when the directory is modified
+            new_file_path = os.path.join(env.dir_name, "new_file.txt")
+            with open(new_file_path, "w") as f:
+                f.write("new")
+            os.utime(env.dir_name, ns=(0, 0))
+            retrieved_file_paths = file_utils.get_files_in_all_sub_directories(
+                env.dir_name, cache_path=cache_path
+            )
+            self.assertIn(new_file_path, retrieved_file_paths)
+            os.remove(new_file_path)
+        os.remove(cache_path)
 
     def test_yaml_file_functions(self):
         yaml_path = "test.yaml"
@@ -95,6 +753,18 @@ class Test_file_utils(unittest.TestCase):
         # Delete yaml file
         os.remove(yaml_path)
 
+    def test_yaml_documents(self):
+        yaml_path = "test.yaml"
+        documents = [{"id": i, "values": list(range(i))} for i in range(5)]
+        # Write documents from a generator
+        file_utils.write_yaml_documents((doc for doc in documents), yaml_path)
+
+        # Read in documents lazily
+        self.assertEqual(list(file_utils.iter_yaml_documents(yaml_path)), documents)
+
+        # Delete yaml file
+        os.remove(yaml_path)
+
     def test_csv_file_functions(self):
         header = ["A", "B", "C"]
         data = [["1", "2", "3"], ["4", "5", "6"]]
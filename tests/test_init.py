@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+import unittest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+HEAVY_MODULES = ["torch", "wandb", "nltk", "slack_sdk", "pglast", "psycopg"]
+
+
+class Test_init(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super(Test_init, self).__init__(*args, **kwargs)
+
+    def _run_in_subprocess(self, code: str) -> str:
+        env = dict(os.environ, PYTHONPATH=os.path.abspath(SRC_DIR))
+        output = subprocess.check_output([sys.executable, "-c", code], env=env)
+        return output.decode().strip()
+
+    def test_import_does_not_load_heavy_modules(self):
+        code = (
+            "import sys; import hkkang_utils; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        )
+        loaded_modules = self._run_in_subprocess(code)
+        self.assertEqual(loaded_modules, "", f"Eagerly loaded: {loaded_modules}")
+
+    def test_submodule_is_loaded_on_access(self):
+        code = (
+            "import sys; import hkkang_utils; "
+            "assert 'hkkang_utils.file' not in sys.modules; "
+            "hkkang_utils.file.create_directory; "
+            "print('hkkang_utils.file' in sys.modules)"
+        )
+        self.assertEqual(self._run_in_subprocess(code), "True")
+
+    def test_unknown_attribute(self):
+        code = (
+            "import hkkang_utils\n"
+            "try:\n"
+            "    hkkang_utils.unknown_module\n"
+            "except AttributeError:\n"
+            "    print('raised')\n"
+        )
+        self.assertEqual(self._run_in_subprocess(code), "raised")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -40,6 +40,17 @@ class Test_list_utils(unittest.TestCase):
         # Validate results
         self.assertEqual(pred, gold1, f"pred: {pred}, gold1: {gold1}")
 
+    def test_divide_into_even_chunks(self):
+        pred = list_utils.divide_into_even_chunks(list(range(10)), 4)
+        gold1 = [[0, 1, 2], [3, 4, 5], [6, 7], [8, 9]]
+        self.assertEqual(pred, gold1, f"pred: {pred}, gold1: {gold1}")
+        # Exactly num_chunks chunks even if the items are not divided evenly
+        pred = list_utils.divide_into_even_chunks(list(range(9)), 6)
+        self.assertEqual(len(pred), 6)
+        self.assertEqual(sum(pred, []), list(range(9)))
+        pred = list_utils.divide_into_even_chunks({"a": 1, "b": 2, "c": 3}, 2)
+        self.assertEqual(pred, [{"a": 1, "b": 2}, {"c": 3}])
+
     def test_chunks(self):
         item1 = list(range(10))
         pred = list(list_utils.chunks(item1, 3))
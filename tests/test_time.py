@@ -153,6 +153,14 @@ class Test_time_utils2(unittest.TestCase):
         self.assertGreater(infos[test_timer_summary2_idx][3], TEST_TIME * 2)
         self.assertLess(infos[test_timer_summary2_idx][3], TEST_TIME * 2 + 1)
 
+    def test_timer_add_elapsed_time(self):
+        timer = time_utils.Timer(class_name="Test_time_utils", func_name="external")
+        timer.add_elapsed_time(1.5)
+        timer.add_elapsed_time(0.5, end_time=time_module.time())
+        self.assertEqual(timer.call_cnt, 2)
+        self.assertAlmostEqual(timer.total_elapsed_time, 2.0)
+        self.assertAlmostEqual(timer.avg_elapsed_time, 1.0)
+
 
 if __name__ == "__main__":
     unittest.main()